@@ -1,20 +1,33 @@
 from flask import Flask
-from flask_socketio import SocketIO
+from .extensions import socketio
+from .config import Config
 import os
 
-socketio = SocketIO()
-
 def create_app():
+    from .logging_setup import setup_logging
+    setup_logging()
+
     app = Flask(__name__)
     app.config["UPLOAD_FOLDER"] = os.path.join(os.getcwd(), "uploads")
+    app.config["MODEL_PATH"] = Config.MODEL_PATH
     os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
 
     app.secret_key = "supersecretkey"  # Needed for login sessions
 
     from .routes import main
     from .auth import auth 
+    from .detection.routes import detection_bp
     app.register_blueprint(main)
     app.register_blueprint(auth)
+    app.register_blueprint(detection_bp, url_prefix="/api")
+
+    # One shared model for every blueprint; loads in the background so the
+    # server accepts connections straight away (see /health).
+    from .models import registry
+    if registry.state == "idle":
+        registry.configure(app.config["MODEL_PATH"])
+        if Config.MODEL_WARMUP:
+            registry.start_background_load()
 
     socketio.init_app(app)
     return app
\ No newline at end of file
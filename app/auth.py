@@ -1,22 +1,9 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session
-import sqlite3, os
+import sqlite3
+from .database import db, init_db
 
 auth = Blueprint("auth", __name__)
 
-DB_PATH = os.path.join(os.getcwd(), "users.db")
-
-# Initialize users table
-def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute('''CREATE TABLE IF NOT EXISTS users (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        username TEXT UNIQUE NOT NULL,
-        password TEXT NOT NULL
-    )''')
-    conn.commit()
-    conn.close()
-
 init_db()
 
 @auth.route("/register", methods=["GET", "POST"])
@@ -25,17 +12,13 @@ def register():
         username = request.form["username"]
         password = request.form["password"]
 
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
         try:
-            cursor.execute("INSERT INTO users (username, password) VALUES (?, ?)", (username, password))
-            conn.commit()
+            with db.transaction() as conn:
+                conn.execute("INSERT INTO users (username, password) VALUES (?, ?)", (username, password))
             flash("Registration successful! Please log in.")
             return redirect(url_for("auth.login"))
         except sqlite3.IntegrityError:
             flash("Username already exists.")
-        finally:
-            conn.close()
 
     return render_template("register.html")
 
@@ -45,11 +28,7 @@ def login():
         username = request.form["username"]
         password = request.form["password"]
 
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM users WHERE username=? AND password=?", (username, password))
-        user = cursor.fetchone()
-        conn.close()
+        user = db.query_one("SELECT id FROM users WHERE username=? AND password=?", (username, password))
 
         if user:
             session["user"] = username
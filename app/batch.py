@@ -0,0 +1,224 @@
+# app/batch.py
+"""
+Offline scorer for whole directories of videos.
+
+    python -m app.batch VIDEO_DIR [--out results.jsonl] [--workers 4] [--batch 32]
+                        [--seq-len N] [--strategy auto] [--recursive] [--retry-failed]
+                        [--model PATH]
+
+Clips are decoded and sampled in a process pool (the same sampler as
+uploads); the sampled frames come back here and are scored in batches of
+`--batch` clips per model call. Every result is appended to `--out` (CSV
+or JSONL, by extension) as soon as its batch is scored, and files already
+in it are skipped, so an interrupted run continues where it stopped.
+"""
+import os
+import csv
+import sys
+import json
+import time
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import numpy as np
+
+from app.config import Config
+from app.detection.jobs import _decode
+from app.detection.sampling import STRATEGIES
+
+VIDEO_EXT = {".mp4", ".mov", ".avi", ".mkv", ".webm"}
+FIELDS = ["path", "label", "confidence", "fake_prob", "error"]
+
+
+def find_videos(root, recursive=False):
+    if os.path.isfile(root):
+        return [root]
+    paths = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        paths.extend(os.path.join(dirpath, f) for f in sorted(filenames)
+                     if os.path.splitext(f)[1].lower() in VIDEO_EXT)
+        if not recursive:
+            break
+        dirnames.sort()
+    return paths
+
+
+class ResultWriter:
+    """Appends result rows to a CSV or JSONL file and knows which paths it already has."""
+
+    def __init__(self, path, retry_failed=False):
+        self.path = path
+        self.csv = path.lower().endswith(".csv")
+        self.done = self._read_done(retry_failed)
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, "a", newline="", encoding="utf-8")
+        self._csv = csv.DictWriter(self._file, FIELDS) if self.csv else None
+        if self._csv is not None and new:
+            self._csv.writeheader()
+
+    def _read_done(self, retry_failed=False):
+        done = set()
+        if not os.path.exists(self.path):
+            return done
+        with open(self.path, newline="", encoding="utf-8") as f:
+            rows = csv.DictReader(f) if self.csv else (json.loads(line) for line in f if line.strip())
+            for row in rows:
+                if not (retry_failed and row.get("error")):
+                    done.add(row["path"])
+        return done
+
+    def write(self, row):
+        if self._csv is not None:
+            self._csv.writerow(row)
+        else:
+            self._file.write(json.dumps(row) + "\n")
+        self.done.add(row["path"])
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class Progress:
+    def __init__(self, total, every=2.0):
+        self.total = total
+        self.every = every
+        self.done = 0
+        self.failed = 0
+        self.start = time.time()
+        self._last = 0.0
+
+    def update(self, n, failed=0, final=False):
+        self.done += n
+        self.failed += failed
+        now = time.time()
+        if not final and now - self._last < self.every:
+            return
+        self._last = now
+        elapsed = max(now - self.start, 1e-9)
+        rate = self.done / elapsed
+        eta = (self.total - self.done) / rate if rate > 0 else 0.0
+        print(f"📊 {self.done}/{self.total} videos | {rate:.2f} videos/s | "
+              f"{self.failed} failed | elapsed {elapsed:.0f}s | eta {eta:.0f}s", flush=True)
+
+
+def score_batch(model, clips):
+    """(label, confidence, fake_prob) for each (seq_len, H, W, 3) uint8 clip, in one model call."""
+    batch = np.stack(clips)
+    probs = model.predict(batch)[:, 0]
+    return [("FAKE", float(p), float(p)) if p > 0.5 else ("REAL", 1.0 - float(p), float(p)) for p in probs]
+
+
+def run(paths, writer, model, workers=4, batch_size=32, seq_len=30, size=(64, 64), strategy="auto"):
+    todo = [p for p in paths if p not in writer.done]
+    print(f"🎬 {len(paths)} videos, {len(paths) - len(todo)} already scored, {len(todo)} to go")
+    progress = Progress(len(todo))
+    pending = {}
+    ready = []  # (path, frames) waiting for the next model call
+    todo_iter = iter(todo)
+    max_in_flight = workers * 2 + batch_size
+
+    def flush_batch():
+        if not ready:
+            return
+        try:
+            results = score_batch(model, [frames for _, frames in ready])
+        except Exception as e:
+            # keep going; the clips are recorded as failed and --retry-failed rescores them
+            error = f"Scoring failed: {e or type(e).__name__}"
+            print(f"⚠️ {error} ({len(ready)} videos)", flush=True)
+            for path, _ in ready:
+                writer.write({"path": path, "label": "", "confidence": "", "fake_prob": "", "error": error})
+            writer.flush()
+            progress.update(len(ready), failed=len(ready))
+            ready.clear()
+            return
+        for (path, _), (label, confidence, prob) in zip(ready, results):
+            writer.write({"path": path, "label": label, "confidence": round(confidence, 4),
+                          "fake_prob": round(prob, 4), "error": ""})
+        writer.flush()
+        progress.update(len(ready))
+        ready.clear()
+
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        while True:
+            for path in todo_iter:
+                pending[pool.submit(_decode, path, seq_len, size, strategy)] = path
+                if len(pending) >= max_in_flight:
+                    break
+            if not pending:
+                break
+            finished, _ = wait(pending, timeout=1.0, return_when=FIRST_COMPLETED)
+            for future in finished:
+                path = pending.pop(future)
+                try:
+                    frames, _ = future.result()
+                    error = None if frames is not None and len(frames) >= seq_len else "Not enough frames"
+                except Exception as e:
+                    frames, error = None, str(e) or type(e).__name__
+                if error:
+                    writer.write({"path": path, "label": "", "confidence": "", "fake_prob": "", "error": error})
+                    progress.update(1, failed=1)
+                else:
+                    ready.append((path, frames))
+            # score once a full batch is ready, or when nothing else is coming
+            if len(ready) >= batch_size or (not pending and ready):
+                flush_batch()
+    flush_batch()
+    writer.flush()
+    progress.update(0, final=True)
+    return progress
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score every video in a directory.")
+    parser.add_argument("source", help="video file or directory")
+    parser.add_argument("--out", default="results.jsonl", help="results file (.jsonl or .csv); resumed if it exists")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) - 1), help="decode processes")
+    parser.add_argument("--batch", type=int, default=32, help="clips per model call")
+    parser.add_argument("--seq-len", type=int, default=None, help="frames per clip (default: the model's)")
+    parser.add_argument("--strategy", choices=STRATEGIES, default=Config.SAMPLER_STRATEGY)
+    parser.add_argument("--recursive", action="store_true")
+    parser.add_argument("--retry-failed", action="store_true", help="rescore files that failed last time")
+    parser.add_argument("--model", default=Config.MODEL_PATH)
+    args = parser.parse_args(argv)
+
+    paths = find_videos(args.source, args.recursive)
+    if not paths:
+        print(f"No videos found in {args.source}")
+        return 1
+
+    from app.logging_setup import setup_logging
+    from app.models import registry, ModelNotReady
+    setup_logging()
+    registry.configure(args.model)
+    try:
+        model = registry.get()
+    except ModelNotReady as e:
+        print("❌", e)
+        return 1
+    expected = model.input_shape[1]
+    if args.seq_len is None:
+        args.seq_len = expected
+    elif args.seq_len != expected:
+        print(f"❌ --seq-len {args.seq_len} doesn't match the model, which takes {expected} frames")
+        return 2
+
+    writer = ResultWriter(args.out, args.retry_failed)
+    try:
+        progress = run(paths, writer, model, args.workers, args.batch, args.seq_len,
+                       (Config.IMG_WIDTH, Config.IMG_HEIGHT), args.strategy)
+    except KeyboardInterrupt:
+        print(f"⏸️ Interrupted, rerun with --out {args.out} to resume")
+        return 130
+    finally:
+        writer.close()
+    print(f"✅ Wrote {args.out} ({progress.failed} failed)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
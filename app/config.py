@@ -0,0 +1,141 @@
+# app/config.py
+import os
+
+
+class Config:
+    # model file, loaded once and shared by every blueprint (see app/models.py)
+    MODEL_PATH = os.environ.get("MODEL_PATH", os.path.join("models", "deepfake_detection_model.h5"))
+    # load + warm up in a background thread at startup instead of on first use
+    MODEL_WARMUP = os.environ.get("MODEL_WARMUP", "1") == "1"
+    # how long a request waits for a model that is still loading
+    MODEL_READY_TIMEOUT = float(os.environ.get("MODEL_READY_TIMEOUT", 30))
+
+    # logging: level and "text" (key=value extras) or "json" (one object per line)
+    LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
+    LOG_FORMAT = os.environ.get("LOG_FORMAT", "text")
+    # Prometheus text metrics at /metrics
+    METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") == "1"
+
+    # users + detection log database (see app/database.py), shared through a
+    # pool of DATABASE_POOL_SIZE connections; detection rows are written in
+    # batches of DETECTION_LOG_BATCH or every DETECTION_LOG_INTERVAL s
+    DATABASE_PATH = os.environ.get("DATABASE_PATH", os.path.join(os.getcwd(), "app.db"))
+    DATABASE_POOL_SIZE = int(os.environ.get("DATABASE_POOL_SIZE", 4))
+    DETECTION_LOG_BATCH = int(os.environ.get("DETECTION_LOG_BATCH", 100))
+    DETECTION_LOG_INTERVAL = float(os.environ.get("DETECTION_LOG_INTERVAL", 1.0))
+    DETECTION_LOG_MAX_PENDING = int(os.environ.get("DETECTION_LOG_MAX_PENDING", 10000))
+    # live streams log a verdict when the label changes, else at most every LIVE_LOG_INTERVAL s
+    LIVE_LOG_INTERVAL = float(os.environ.get("LIVE_LOG_INTERVAL", 10.0))
+
+    # model input
+    SEQUENCE_LENGTH = 30
+    IMG_HEIGHT = 64
+    IMG_WIDTH = 64
+
+    # live inference scheduling: "stride" (every N frames), "adaptive"
+    # (as soon as the previous prediction finished) or "rate" (target
+    # predictions per second)
+    INFERENCE_MODE = os.environ.get("INFERENCE_MODE", "adaptive")
+    INFERENCE_EVERY_N = int(os.environ.get("INFERENCE_EVERY_N", 5))
+    INFERENCE_TARGET_PPS = float(os.environ.get("INFERENCE_TARGET_PPS", 2.0))
+
+    # live stream admission and reaping
+    MAX_STREAMS = int(os.environ.get("MAX_STREAMS", 4))
+    MAX_STREAMS_PER_USER = int(os.environ.get("MAX_STREAMS_PER_USER", 1))
+    STREAM_IDLE_TIMEOUT = float(os.environ.get("STREAM_IDLE_TIMEOUT", 60))
+    # how long a stream survives after its last MJPEG viewer disconnects
+    STREAM_VIEWER_GRACE = float(os.environ.get("STREAM_VIEWER_GRACE", 10))
+
+    # live MJPEG output: default viewer profile ("auto" adapts per viewer, or
+    # high/medium/low/minimal) and JPEG backend ("auto", "turbojpeg", "opencv")
+    OUTPUT_PROFILE = os.environ.get("OUTPUT_PROFILE", "auto")
+    JPEG_BACKEND = os.environ.get("JPEG_BACKEND", "auto")
+
+    # live sources are read on their own thread keeping only the newest frame
+    # (see app/detection/grabber.py): open/read timeout, reconnect backoff
+    # (doubling from MIN to MAX seconds, SOURCE_MAX_RETRIES attempts, 0 =
+    # forever) and file pacing to native fps ("auto" = files only, "1", "0")
+    SOURCE_TIMEOUT = float(os.environ.get("SOURCE_TIMEOUT", 5.0))
+    SOURCE_BACKOFF_MIN = float(os.environ.get("SOURCE_BACKOFF_MIN", 0.5))
+    SOURCE_BACKOFF_MAX = float(os.environ.get("SOURCE_BACKOFF_MAX", 10.0))
+    SOURCE_MAX_RETRIES = int(os.environ.get("SOURCE_MAX_RETRIES", 0))
+    SOURCE_PACE = os.environ.get("SOURCE_PACE", "auto")
+
+    # URL sources: resolved stream URLs are cached per video id until the
+    # expiry signed into them minus RESOLVER_EXPIRY_MARGIN s (RESOLVER_TTL s
+    # if unsigned), resolved on RESOLVER_WORKERS background threads
+    RESOLVER_WORKERS = int(os.environ.get("RESOLVER_WORKERS", 2))
+    RESOLVER_TTL = float(os.environ.get("RESOLVER_TTL", 300))
+    RESOLVER_EXPIRY_MARGIN = float(os.environ.get("RESOLVER_EXPIRY_MARGIN", 60))
+    RESOLVER_MAX_ENTRIES = int(os.environ.get("RESOLVER_MAX_ENTRIES", 256))
+    RESOLVER_TIMEOUT = float(os.environ.get("RESOLVER_TIMEOUT", 30))
+
+    # minimum gap between Socket.IO overlay pushes to one stream's room
+    OVERLAY_MIN_INTERVAL = float(os.environ.get("OVERLAY_MIN_INTERVAL", 0.2))
+
+    # crop to the largest face (OpenCV Haar cascade) before the resize to the
+    # model input; live streams run the detector every FACE_DETECT_EVERY
+    # frames on a copy downscaled to FACE_DETECT_WIDTH and reuse the box in between
+    FACE_CROP = os.environ.get("FACE_CROP", "0") == "1"
+    FACE_DETECT_EVERY = int(os.environ.get("FACE_DETECT_EVERY", 5))
+    FACE_MARGIN = float(os.environ.get("FACE_MARGIN", 0.25))
+    FACE_DETECT_WIDTH = int(os.environ.get("FACE_DETECT_WIDTH", 320))
+
+    # skip live predictions while the 64x64 window barely changes: mean abs
+    # difference between consecutive frames (0-255 scale) above CHANGE_NOISE
+    # accumulates until it reaches CHANGE_THRESHOLD; a score older than
+    # CHANGE_MAX_AGE seconds is refreshed anyway
+    CHANGE_GATE = os.environ.get("CHANGE_GATE", "1") == "1"
+    CHANGE_THRESHOLD = float(os.environ.get("CHANGE_THRESHOLD", 4.0))
+    CHANGE_NOISE = float(os.environ.get("CHANGE_NOISE", 1.0))
+    CHANGE_MAX_AGE = float(os.environ.get("CHANGE_MAX_AGE", 5.0))
+
+    # cross-stream micro-batching for the shared model; a caller gives up on
+    # its batch after INFERENCE_TIMEOUT seconds
+    INFERENCE_MAX_BATCH = int(os.environ.get("INFERENCE_MAX_BATCH", 8))
+    INFERENCE_MAX_WAIT_MS = float(os.environ.get("INFERENCE_MAX_WAIT_MS", 5))
+    INFERENCE_TIMEOUT = float(os.environ.get("INFERENCE_TIMEOUT", 30))
+
+    # batch sizes the compiled predictor traces ahead of time
+    PREDICTOR_BATCH_SIZES = tuple(int(b) for b in os.environ.get("PREDICTOR_BATCH_SIZES", "1,2,4,8").split(","))
+    # "keras" (float32 TensorFlow), "tflite-fp16" or "tflite-int8" (dynamic
+    # range); an optimized backend is only used if it flips at most
+    # PARITY_MAX_FLIP_RATE of REAL/FAKE decisions on CALIBRATION_SAMPLES
+    # sequences sampled from the videos in CALIBRATION_DIR (without any, it
+    # stays on Keras unless CALIBRATION_ALLOW_RANDOM=1 checks on noise)
+    INFERENCE_BACKEND = os.environ.get("INFERENCE_BACKEND", "keras")
+    TFLITE_THREADS = int(os.environ.get("TFLITE_THREADS", os.cpu_count() or 1))
+    CALIBRATION_DIR = os.environ.get("CALIBRATION_DIR", os.path.join("models", "calibration"))
+    CALIBRATION_SAMPLES = int(os.environ.get("CALIBRATION_SAMPLES", 32))
+    PARITY_MAX_FLIP_RATE = float(os.environ.get("PARITY_MAX_FLIP_RATE", 0.02))
+    CALIBRATION_ALLOW_RANDOM = os.environ.get("CALIBRATION_ALLOW_RANDOM", "0") == "1"
+    # live streams: run the CNN only on new frames and keep their embeddings
+    # (falls back to the full model if it can't be split at TimeDistributed)
+    INCREMENTAL_INFERENCE = os.environ.get("INCREMENTAL_INFERENCE", "1") == "1"
+
+    # upload frame sampling (see app/detection/sampling.py); seek instead of
+    # decoding through gaps longer than SAMPLER_SEEK_GAP frames (~ one GOP)
+    SAMPLER_STRATEGY = os.environ.get("SAMPLER_STRATEGY", "auto")
+    SAMPLER_SEEK_GAP = int(os.environ.get("SAMPLER_SEEK_GAP", 250))
+
+    # dense "segments" scoring of uploads (see app/detection/segments.py): a
+    # window every SEGMENT_STRIDE kept frames, every SEGMENT_FRAME_STEP-th
+    # frame kept, SEGMENT_BATCH windows per model call; stop after
+    # SEGMENT_EARLY_EXIT windows above 0.5, checked after each model call
+    # (0 = score the whole clip; the verdict is the same either way)
+    SEGMENT_STRIDE = int(os.environ.get("SEGMENT_STRIDE", 15))
+    SEGMENT_FRAME_STEP = int(os.environ.get("SEGMENT_FRAME_STEP", 1))
+    SEGMENT_BATCH = int(os.environ.get("SEGMENT_BATCH", 8))
+    SEGMENT_EARLY_EXIT = int(os.environ.get("SEGMENT_EARLY_EXIT", 0))
+
+    # asynchronous upload jobs (see app/detection/jobs.py)
+    JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 2))
+    JOB_MAX_PENDING = int(os.environ.get("JOB_MAX_PENDING", 8))
+    JOB_RESULT_TTL = float(os.environ.get("JOB_RESULT_TTL", 600))
+
+    # upload result cache keyed by (content hash, model version, sampling params),
+    # stored in the app database; expired/overflowing entries are evicted
+    # every RESULT_CACHE_EVICT_EVERY puts
+    RESULT_CACHE_MAX_ENTRIES = int(os.environ.get("RESULT_CACHE_MAX_ENTRIES", 10000))
+    RESULT_CACHE_TTL = float(os.environ.get("RESULT_CACHE_TTL", 7 * 24 * 3600))
+    RESULT_CACHE_EVICT_EVERY = int(os.environ.get("RESULT_CACHE_EVICT_EVERY", 100))
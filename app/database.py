@@ -1,24 +1,255 @@
 # app/database.py
+import os
+import time
+import queue
+import atexit
+import logging
 import sqlite3
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+from app.config import Config
+from app.metrics import DETECTION_LOG_ROWS
+
+log = logging.getLogger(__name__)
+
+SCHEMA = [
+    '''CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE NOT NULL,
+        password TEXT NOT NULL
+    )''',
+    '''CREATE TABLE IF NOT EXISTS detections (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp REAL NOT NULL,
+        username TEXT,
+        source TEXT NOT NULL,
+        filename TEXT,
+        label TEXT NOT NULL,
+        confidence REAL NOT NULL,
+        mode TEXT
+    )''',
+    "CREATE INDEX IF NOT EXISTS idx_detections_timestamp ON detections (timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_detections_username ON detections (username, timestamp)",
+    # upload result cache (see app/detection/cache.py)
+    '''CREATE TABLE IF NOT EXISTS results (
+        content_hash TEXT NOT NULL,
+        model_version TEXT NOT NULL,
+        params TEXT NOT NULL,
+        label TEXT NOT NULL,
+        confidence REAL NOT NULL,
+        created REAL NOT NULL,
+        last_used REAL NOT NULL,
+        PRIMARY KEY (content_hash, model_version, params)
+    )''',
+    "CREATE INDEX IF NOT EXISTS idx_results_last_used ON results (last_used)",
+    "CREATE INDEX IF NOT EXISTS idx_results_created ON results (created)",
+]
+
+# per-connection settings; WAL journaling is a property of the file and is
+# switched on once in init_schema
+PRAGMAS = [
+    "PRAGMA synchronous=NORMAL",    # safe with WAL, fsync only at checkpoints
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-8000",      # 8 MB page cache per connection
+    "PRAGMA foreign_keys=ON",
+]
+
+
+class Database:
+    """
+    The app's single SQLite database (users, detection logs, upload results).
+
+    Connections come from a bounded pool of at most `pool_size`, opened
+    lazily with the pragmas above and reused across threads, so a
+    request thread checks one out instead of connecting. Past the limit,
+    callers wait up to `timeout` seconds for one to be returned.
+    """
+
+    def __init__(self, path, pool_size=4, timeout=5.0):
+        self.path = path
+        self.pool_size = max(1, pool_size)
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()  # most recently used first, its page cache is warm
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    def _open(self):
+        conn = sqlite3.connect(self.path, timeout=self.timeout, check_same_thread=False)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """Check a connection out of the pool for the duration of the block."""
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                grow = self._opened < self.pool_size
+                if grow:
+                    self._opened += 1
+            if grow:
+                try:
+                    conn = self._open()
+                except Exception:
+                    with self._lock:
+                        self._opened -= 1
+                    raise
+            else:
+                try:
+                    conn = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    raise sqlite3.OperationalError("no database connection available") from None
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()  # don't hand the next caller someone else's open transaction
+            self._idle.put(conn)
+
+    @contextmanager
+    def transaction(self):
+        """Connection whose statements commit together, or roll back on error."""
+        with self.connection() as conn:
+            try:
+                yield conn
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+    def query(self, sql, params=()):
+        with self.connection() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def query_one(self, sql, params=()):
+        with self.connection() as conn:
+            return conn.execute(sql, params).fetchone()
+
+    def init_schema(self, legacy_users=None):
+        with self.connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")  # persistent: readers don't block the writer
+        with self.transaction() as conn:
+            for statement in SCHEMA:
+                conn.execute(statement)
+        if legacy_users and os.path.exists(legacy_users) \
+                and os.path.abspath(legacy_users) != os.path.abspath(self.path):
+            self._import_users(legacy_users)
+
+    def _import_users(self, legacy_path):
+        # accounts from the old per-module users.db carry over once
+        with self.connection() as conn:
+            conn.execute("ATTACH DATABASE ? AS legacy", (legacy_path,))
+            try:
+                cur = conn.execute("INSERT OR IGNORE INTO users (username, password) "
+                                   "SELECT username, password FROM legacy.users")
+                conn.commit()
+                if cur.rowcount > 0:
+                    log.info("Imported legacy users", extra={"count": cur.rowcount, "path": legacy_path})
+            except sqlite3.OperationalError:
+                conn.rollback()  # no users table in there
+            finally:
+                conn.execute("DETACH DATABASE legacy")
+
+
+class DetectionLogWriter:
+    """
+    Batched, non-blocking writer for the detections table.
+
+    `log()` only appends to an in-memory queue; a background thread writes
+    whatever is queued in one transaction every `interval` seconds (or as
+    soon as `batch_size` rows are waiting). Past `max_pending` queued rows
+    new ones are dropped rather than slowing the caller down.
+    """
+
+    COLUMNS = ("timestamp", "username", "source", "filename", "label", "confidence", "mode")
+
+    def __init__(self, db, batch_size=100, interval=1.0, max_pending=10000):
+        self.db = db
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_pending = max_pending
+        self.written = 0
+        self.dropped = 0
+        self._pending = deque()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._running = False
+
+    def log(self, source, label, confidence, username=None, filename=None, mode=None, timestamp=None):
+        row = (time.time() if timestamp is None else timestamp, username, source, filename,
+               label, float(confidence), mode)
+        with self._cond:
+            if len(self._pending) >= self.max_pending:
+                self.dropped += 1
+                DETECTION_LOG_ROWS.labels(result="dropped").inc()
+                return False
+            self._pending.append(row)
+            if self._thread is None:
+                self._start()
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify()
+        return True
+
+    def flush(self):
+        """Write everything queued so far from the calling thread."""
+        with self._cond:
+            rows = list(self._pending)
+            self._pending.clear()
+        self._write(rows)
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        self.flush()
+
+    def _start(self):
+        # caller holds self._cond
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="detection-log-writer", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if self._running and len(self._pending) < self.batch_size:
+                    self._cond.wait(self.interval)
+                rows = list(self._pending)
+                self._pending.clear()
+                running = self._running
+            self._write(rows)
+            if not running:
+                return
+
+    def _write(self, rows):
+        if not rows:
+            return
+        try:
+            with self.db.transaction() as conn:
+                conn.executemany(
+                    f"INSERT INTO detections ({', '.join(self.COLUMNS)}) VALUES ({', '.join('?' * len(self.COLUMNS))})",
+                    rows)
+            self.written += len(rows)
+            DETECTION_LOG_ROWS.labels(result="written").inc(len(rows))
+        except sqlite3.Error as e:
+            self.dropped += len(rows)
+            DETECTION_LOG_ROWS.labels(result="dropped").inc(len(rows))
+            log.error("Detection log write failed: %s", e, extra={"rows": len(rows)})
+
+
+db = Database(Config.DATABASE_PATH, Config.DATABASE_POOL_SIZE)
+detection_log = DetectionLogWriter(db, Config.DETECTION_LOG_BATCH, Config.DETECTION_LOG_INTERVAL,
+                                   Config.DETECTION_LOG_MAX_PENDING)
+atexit.register(detection_log.stop)
+
 
 def init_db():
-    conn = sqlite3.connect("app.db")
-    cursor = conn.cursor()
-
-    # Create logs table (if not already created)
-    cursor.execute('''CREATE TABLE IF NOT EXISTS logs (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        video_name TEXT,
-                        label TEXT,
-                        confidence REAL,
-                        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-                    )''')
-
-    # Create users table
-    cursor.execute('''CREATE TABLE IF NOT EXISTS users (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        username TEXT UNIQUE NOT NULL,
-                        password TEXT NOT NULL
-                    )''')
-    conn.commit()
-    conn.close()
+    db.init_schema(legacy_users=os.path.join(os.getcwd(), "users.db"))
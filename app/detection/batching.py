@@ -0,0 +1,172 @@
+# app/detection/batching.py
+import time
+import threading
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+
+from app.detection.preprocess import to_uint8
+from app.metrics import MODEL_BATCH_SIZE, MODEL_CALL_LATENCY, MODEL_QUEUE_WAIT
+
+
+class BatchStats:
+    """Latency and throughput for batches of one size."""
+
+    def __init__(self):
+        self.batches = 0
+        self.total_s = 0.0
+        self.max_s = 0.0
+
+    def record(self, seconds):
+        self.batches += 1
+        self.total_s += seconds
+        self.max_s = max(self.max_s, seconds)
+
+    def as_dict(self, size):
+        avg = self.total_s / self.batches if self.batches else 0.0
+        return {
+            "batches": self.batches,
+            "avg_ms": round(avg * 1000.0, 2),
+            "max_ms": round(self.max_s * 1000.0, 2),
+            "sequences_per_s": round(size / avg, 2) if avg else 0.0,
+        }
+
+
+class BatchingInferenceServer:
+    """
+    Owns the shared model and scores sequences from every live stream and
+    upload in dynamic batches.
+
+    Each `submit` returns a Future for one (seq_len, H, W, 3) sequence. A
+    single worker thread waits for the first pending sequence, then keeps
+    collecting until `max_batch_size` are queued or `max_wait_ms` has
+    passed, and runs them through the model in one call.
+
+    `predict(batch)` mirrors `model.predict`, so the server can be passed
+    anywhere a Keras model is expected; it waits at most `timeout` seconds
+    for the whole batch (concurrent.futures.TimeoutError after that).
+    Sequences whose shape doesn't match the model input are rejected in
+    `submit`, so one bad caller can't fail a batch shared with others.
+    """
+
+    def __init__(self, model, max_batch_size=8, max_wait_ms=5.0, timeout=30.0):
+        self.model = model
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max_wait_ms / 1000.0
+        self.timeout = timeout
+        shape = getattr(model, "input_shape", None)
+        self.input_shape = tuple(shape[1:]) if shape is not None else None  # per sequence
+        self._pending = deque()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._running = False
+        self._input = None  # (max_batch_size, seq_len, H, W, 3), allocated on first batch
+        self._stats = {}
+        self._queue_wait_s = 0.0
+        self._completed = 0
+
+    # ---------- client side ----------
+    def submit(self, sequence):
+        """Queue one uint8 sequence (seq_len, H, W, 3); resolves to its fake probability."""
+        sequence = to_uint8(sequence)
+        if sequence.ndim == 5:
+            sequence = sequence[0]
+        if self.input_shape is not None and (
+                sequence.ndim != len(self.input_shape)
+                or any(want is not None and want != got for want, got in zip(self.input_shape, sequence.shape))):
+            raise ValueError(f"sequence shape {sequence.shape} doesn't match model input {self.input_shape}")
+        future = Future()
+        with self._cond:
+            self._ensure_started()
+            self._pending.append((sequence, future, time.perf_counter()))
+            self._cond.notify()
+        return future
+
+    def predict(self, batch, timeout=None, **kwargs):
+        """Keras-style predict: (N, seq_len, H, W, 3) -> (N, 1) probabilities."""
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        futures = [self.submit(sequence) for sequence in batch]
+        try:
+            return np.array([[f.result(max(0.0, deadline - time.monotonic()))] for f in futures],
+                            dtype=np.float32)
+        except BaseException:
+            for future in futures:
+                future.cancel()  # still queued: dropped instead of scored for nobody
+            raise
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def stats(self):
+        with self._cond:
+            pending = len(self._pending)
+        return {
+            "pending": pending,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "avg_queue_wait_ms": round(self._queue_wait_s / self._completed * 1000.0, 2) if self._completed else 0.0,
+            "by_batch_size": {size: s.as_dict(size) for size, s in sorted(self._stats.items())},
+        }
+
+    # ---------- worker side ----------
+    def _ensure_started(self):
+        # caller holds self._cond
+        if self._running and self._thread is not None and self._thread.is_alive():
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._serve, name="inference-batcher", daemon=True)
+        self._thread.start()
+
+    def _next_batch(self):
+        with self._cond:
+            while self._running and not self._pending:
+                self._cond.wait()
+            if not self._running:
+                return []
+            deadline = time.perf_counter() + self.max_wait
+            while len(self._pending) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            n = min(len(self._pending), self.max_batch_size)
+            return [self._pending.popleft() for _ in range(n)]
+
+    def _serve(self):
+        while self._running:
+            items = self._next_batch()
+            if not items:
+                continue
+            items = [item for item in items if item[1].set_running_or_notify_cancel()]
+            if not items:
+                continue
+            n = len(items)
+            try:
+                # a mis-shaped sequence fails its batch here rather than
+                # killing this thread and leaving every caller waiting
+                if self._input is None or self._input.shape[1:] != items[0][0].shape:
+                    self._input = np.zeros((self.max_batch_size,) + items[0][0].shape, dtype=items[0][0].dtype)
+                for i, (sequence, _, _) in enumerate(items):
+                    self._input[i] = sequence
+                start = time.perf_counter()
+                preds = self.model.predict(self._input[:n])
+            except Exception as e:
+                for _, future, _ in items:
+                    future.set_exception(e)
+                continue
+            elapsed = time.perf_counter() - start
+
+            self._stats.setdefault(n, BatchStats()).record(elapsed)
+            MODEL_BATCH_SIZE.observe(n)
+            MODEL_CALL_LATENCY.observe(elapsed)
+            for i, (_, future, queued) in enumerate(items):
+                self._queue_wait_s += start - queued
+                MODEL_QUEUE_WAIT.observe(start - queued)
+                self._completed += 1
+                future.set_result(float(preds[i][0]))
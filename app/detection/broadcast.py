@@ -0,0 +1,117 @@
+# app/detection/broadcast.py
+import time
+import threading
+
+from app.detection.encoding import JpegEncoder, PROFILES
+from app.metrics import STAGE_LATENCY, VIEWER_FRAMES_SKIPPED
+
+_encode_latency = STAGE_LATENCY.labels(stage="encode")
+
+
+class FrameBroadcaster:
+    """
+    Latest frame of one stream, fanned out to every viewer.
+
+    The encoder stage publishes each annotated frame once with a sequence
+    number; viewers block on a condition variable until the sequence moves
+    past the one they last sent. A slow viewer never queues anything: it
+    just gets the newest frame next time round.
+
+    JPEGs are encoded lazily, at most once per (frame, output profile), so
+    any number of viewers on the same profile share one encode and nothing
+    is encoded while nobody is watching.
+    """
+
+    def __init__(self, encoder=None):
+        self.encoder = encoder or JpegEncoder()
+        self.subscribers = 0
+        self.idle_since = time.time()  # when the last viewer left (or creation)
+        self.skipped = 0
+        self.sent = 0
+        self.encodes = 0
+        self.encode_s = 0.0
+        self._cond = threading.Condition()
+        self._encode_lock = threading.Lock()
+        self._seq = 0
+        self._frame = None
+        self._encoded = {}  # profile key -> (seq, jpeg)
+        self._closed = False
+
+    @property
+    def closed(self):
+        return self._closed
+
+    @property
+    def seq(self):
+        return self._seq
+
+    def publish(self, frame):
+        with self._cond:
+            self._frame = frame
+            self._seq += 1
+            self._cond.notify_all()
+
+    def latest(self, profile=None):
+        with self._cond:
+            seq, frame = self._seq, self._frame
+        if frame is None:
+            return seq, None
+        return seq, self._encode(seq, frame, profile or PROFILES[0])
+
+    def wait_next(self, last_seq, profile=None, timeout=1.0):
+        """
+        Block until a frame newer than `last_seq` is published. Returns
+        (seq, jpeg) in `profile`, or (last_seq, None) on timeout or once
+        closed.
+        """
+        with self._cond:
+            if self._seq == last_seq and not self._closed:
+                self._cond.wait(timeout)
+            if self._seq == last_seq or self._frame is None:
+                return last_seq, None
+            if last_seq and self._seq - last_seq > 1:
+                self.skipped += self._seq - last_seq - 1
+                VIEWER_FRAMES_SKIPPED.inc(self._seq - last_seq - 1)
+            self.sent += 1
+            seq, frame = self._seq, self._frame
+        return seq, self._encode(seq, frame, profile or PROFILES[0])
+
+    def _encode(self, seq, frame, profile):
+        with self._encode_lock:
+            cached = self._encoded.get(profile.key)
+            if cached is not None and cached[0] == seq:
+                return cached[1]
+            start = time.perf_counter()
+            jpeg = self.encoder.encode(frame, profile)
+            elapsed = time.perf_counter() - start
+            self.encode_s += elapsed
+            _encode_latency.observe(elapsed)
+            self.encodes += 1
+            self._encoded[profile.key] = (seq, jpeg)
+            return jpeg
+
+    def subscribe(self):
+        with self._cond:
+            self.subscribers += 1
+
+    def unsubscribe(self):
+        with self._cond:
+            self.subscribers = max(0, self.subscribers - 1)
+            if self.subscribers == 0:
+                self.idle_since = time.time()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def stats(self):
+        return {
+            "viewers": self.subscribers,
+            "seq": self._seq,
+            "sent": self.sent,
+            "skipped": self.skipped,
+            "encodes": self.encodes,
+            "encode_ms": round(self.encode_s / self.encodes * 1000.0, 2) if self.encodes else 0.0,
+            "jpeg_backend": self.encoder.backend,
+        }
@@ -0,0 +1,143 @@
+# app/detection/cache.py
+import os
+import time
+import glob
+import hashlib
+import tempfile
+import threading
+
+from app.metrics import RESULT_CACHE
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def save_upload(file_storage, folder, chunk_size=CHUNK_SIZE):
+    """
+    Stream an upload to disk while hashing it, then store it
+    content-addressed as `<sha256><ext>`. Returns (sha256, path).
+    """
+    _, ext = os.path.splitext(file_storage.filename or "")
+    digest = hashlib.sha256()
+    fd, tmp_path = tempfile.mkstemp(dir=folder, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = file_storage.stream.read(chunk_size)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                out.write(chunk)
+        content_hash = digest.hexdigest()
+        path = os.path.join(folder, content_hash + ext.lower())
+        os.replace(tmp_path, path)  # same bytes if it already existed
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return content_hash, path
+
+
+def file_digest(path, chunk_size=CHUNK_SIZE):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def remove_upload(folder, content_hash):
+    for path in glob.glob(os.path.join(folder, content_hash + "*")):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class ResultCache:
+    """
+    Persistent (content hash, model version, sampling params) -> result
+    cache, so re-uploaded clips are answered without decoding.
+
+    Lives in the `results` table of the app `Database`, on its connection
+    pool. Entries expire after `ttl` seconds (expired ones are never
+    served); past `max_entries` the least recently used ones go first.
+    Both are enforced by `evict()`, which runs every `evict_every` puts
+    rather than on each one. `on_evict(content_hash)` is called for every
+    evicted entry, e.g. to drop the stored upload.
+    """
+
+    def __init__(self, db, max_entries=10000, ttl=7 * 24 * 3600, on_evict=None, evict_every=100):
+        self.db = db
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.on_evict = on_evict
+        self.evict_every = max(1, evict_every)
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+        self._lock = threading.Lock()
+
+    def get(self, content_hash, model_version, params):
+        now = time.time()
+        with self.db.transaction() as conn:
+            row = conn.execute(
+                "SELECT label, confidence, created FROM results "
+                "WHERE content_hash=? AND model_version=? AND params=?",
+                (content_hash, model_version, params)).fetchone()
+            if row is not None and now - row[2] <= self.ttl:
+                conn.execute(
+                    "UPDATE results SET last_used=? WHERE content_hash=? AND model_version=? AND params=?",
+                    (now, content_hash, model_version, params))
+        if row is None or now - row[2] > self.ttl:
+            self.misses += 1
+            RESULT_CACHE.labels(result="miss").inc()
+            return None
+        self.hits += 1
+        RESULT_CACHE.labels(result="hit").inc()
+        return {"result": row[0], "confidence": row[1]}
+
+    def put(self, content_hash, model_version, params, label, confidence):
+        now = time.time()
+        with self.db.transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (content_hash, model_version, params, label, float(confidence), now, now))
+        with self._lock:
+            self._puts += 1
+            due = self._puts % self.evict_every == 0
+        if due:
+            self.evict(now)
+
+    def holds(self, content_hash):
+        """True while any entry (any model version or params) refers to `content_hash`."""
+        return self.db.query_one("SELECT 1 FROM results WHERE content_hash=? LIMIT 1", (content_hash,)) is not None
+
+    def evict(self, now=None):
+        """Drop expired entries and trim to `max_entries`; returns evicted hashes."""
+        now = time.time() if now is None else now
+        with self.db.transaction() as conn:
+            expired = conn.execute(
+                "SELECT content_hash FROM results WHERE created < ?", (now - self.ttl,)).fetchall()
+            conn.execute("DELETE FROM results WHERE created < ?", (now - self.ttl,))
+            count = conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+            overflow = []
+            if count > self.max_entries:
+                overflow = conn.execute(
+                    "SELECT rowid, content_hash FROM results ORDER BY last_used LIMIT ?",
+                    (count - self.max_entries,)).fetchall()
+                conn.executemany("DELETE FROM results WHERE rowid=?", [(r[0],) for r in overflow])
+            evicted = {r[0] for r in expired} | {r[1] for r in overflow}
+            # keep uploads other entries (other model versions/params) still point at
+            still_used = {r[0] for r in conn.execute(
+                "SELECT DISTINCT content_hash FROM results WHERE content_hash IN (%s)"
+                % ",".join("?" * len(evicted)), tuple(evicted)).fetchall()} if evicted else set()
+        evicted -= still_used
+        if self.on_evict is not None:
+            for content_hash in evicted:
+                self.on_evict(content_hash)
+        return evicted
+
+    def stats(self):
+        entries = self.db.query_one("SELECT COUNT(*) FROM results")[0]
+        return {"entries": entries, "hits": self.hits, "misses": self.misses,
+                "max_entries": self.max_entries, "ttl_s": self.ttl}
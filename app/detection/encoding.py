@@ -0,0 +1,113 @@
+# app/detection/encoding.py
+import time
+import logging
+
+import cv2
+
+try:  # optional, much faster JPEG encoder (pip install PyTurboJPEG)
+    from turbojpeg import TurboJPEG
+except ImportError:
+    TurboJPEG = None
+
+log = logging.getLogger(__name__)
+
+
+class OutputProfile:
+    """How one viewer receives the live feed: size cap, JPEG quality, frame rate cap."""
+
+    def __init__(self, name, max_width, quality, max_fps):
+        self.name = name
+        self.max_width = max_width
+        self.quality = quality
+        self.max_fps = max_fps
+
+    @property
+    def key(self):
+        return (self.max_width, self.quality)
+
+    def as_dict(self):
+        return {"profile": self.name, "max_width": self.max_width,
+                "quality": self.quality, "max_fps": self.max_fps}
+
+
+# best first; adaptive viewers move down the ladder when they fall behind
+PROFILES = [
+    OutputProfile("high", 1280, 85, 30),
+    OutputProfile("medium", 960, 75, 20),
+    OutputProfile("low", 640, 65, 15),
+    OutputProfile("minimal", 426, 50, 8),
+]
+PROFILE_NAMES = [p.name for p in PROFILES]
+
+
+class JpegEncoder:
+    """JPEG encoding through libjpeg-turbo when available, OpenCV otherwise."""
+
+    def __init__(self, backend="auto"):
+        self._turbo = None
+        if backend in ("auto", "turbojpeg") and TurboJPEG is not None:
+            try:
+                self._turbo = TurboJPEG()
+            except Exception as e:  # library present but libturbojpeg missing
+                log.warning("TurboJPEG unavailable, using OpenCV: %s", e)
+        if backend == "turbojpeg" and self._turbo is None:
+            log.warning("JPEG_BACKEND=turbojpeg requested but not available, using OpenCV")
+        self.backend = "turbojpeg" if self._turbo is not None else "opencv"
+
+    def encode(self, frame, profile):
+        height, width = frame.shape[:2]
+        if width > profile.max_width:
+            scale = profile.max_width / width
+            frame = cv2.resize(frame, (profile.max_width, int(height * scale)), interpolation=cv2.INTER_AREA)
+        if self._turbo is not None:
+            return self._turbo.encode(frame, quality=profile.quality)
+        ok, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, profile.quality])
+        return buffer.tobytes() if ok else None
+
+
+class AdaptiveQuality:
+    """
+    Per-viewer profile controller.
+
+    After every frame it is told how long writing it to the client took
+    (the generator blocks on a full socket). Writes that repeatedly take
+    longer than the frame budget step down the ladder; a long run of
+    on-time writes steps back up. With a named profile instead of "auto"
+    the profile is pinned and only frame pacing applies.
+    """
+
+    def __init__(self, profile="auto", down_after=3, up_after=60):
+        self.auto = profile not in PROFILE_NAMES
+        self.level = 1 if self.auto else PROFILE_NAMES.index(profile)
+        self.down_after = down_after
+        self.up_after = up_after
+        self._behind = 0
+        self._on_time = 0
+        self._last_sent = 0.0
+
+    @property
+    def profile(self):
+        return PROFILES[self.level]
+
+    def wait_time(self, now=None):
+        """Seconds to hold off before the next frame to respect `max_fps`."""
+        now = time.time() if now is None else now
+        return max(0.0, self._last_sent + 1.0 / self.profile.max_fps - now)
+
+    def sent(self, write_s, now=None):
+        self._last_sent = time.time() if now is None else now
+        if not self.auto:
+            return
+        budget = 1.0 / self.profile.max_fps
+        if write_s > budget:
+            self._behind += 1
+            self._on_time = 0
+        else:
+            self._on_time += 1
+            self._behind = 0
+        if self._behind >= self.down_after and self.level < len(PROFILES) - 1:
+            self.level += 1
+            self._behind = 0
+        elif self._on_time >= self.up_after and self.level > 0:
+            self.level -= 1
+            self._on_time = 0
@@ -0,0 +1,70 @@
+# app/detection/gating.py
+import time
+
+import cv2
+
+from app.config import Config
+from app.metrics import INFERENCE_SKIPPED
+
+
+class ChangeGate:
+    """
+    Skips re-scoring a window whose content has barely changed.
+
+    Every new (already downscaled) frame is compared with the one before it
+    by mean absolute difference; differences above `noise` (sensor noise,
+    compression flicker) add up until the next prediction. A prediction is
+    let through once that sum reaches `threshold`, or when the last score
+    is older than `max_age` seconds, so a static scene is still re-checked
+    now and then. Skipped windows keep the previous score.
+    """
+
+    def __init__(self, threshold=4.0, noise=1.0, max_age=5.0):
+        self.threshold = threshold
+        self.noise = noise
+        self.max_age = max_age
+        self.change = 0.0  # accumulated change since the last prediction
+        self.last_diff = 0.0
+        self.last_result = None
+        self.checked = 0
+        self.skipped = 0
+        self._last_run = None
+
+    @classmethod
+    def from_config(cls):
+        """A gate from Config, or None when CHANGE_GATE is off."""
+        if not Config.CHANGE_GATE:
+            return None
+        return cls(Config.CHANGE_THRESHOLD, Config.CHANGE_NOISE, Config.CHANGE_MAX_AGE)
+
+    def observe(self, window):
+        """Call after each push; compares the window's two newest frames."""
+        if len(window) < 2:
+            return
+        recent = window.view()[-2:]
+        self.last_diff = cv2.norm(recent[1], recent[0], cv2.NORM_L1) / recent[1].size
+        if self.last_diff > self.noise:
+            self.change += self.last_diff
+
+    def allow(self, now=None):
+        """True if the window changed enough (or the score is stale) to predict again."""
+        now = time.time() if now is None else now
+        self.checked += 1
+        if (self._last_run is None or self.change >= self.threshold
+                or now - self._last_run >= self.max_age):
+            self.change = 0.0
+            self._last_run = now
+            return True
+        self.skipped += 1
+        INFERENCE_SKIPPED.inc()
+        return False
+
+    def stats(self):
+        return {
+            "checked": self.checked,
+            "skipped": self.skipped,
+            "skip_rate": round(self.skipped / self.checked, 3) if self.checked else 0.0,
+            "change": round(self.change, 2),
+            "last_diff": round(self.last_diff, 2),
+            "threshold": self.threshold,
+        }
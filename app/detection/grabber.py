@@ -0,0 +1,262 @@
+# app/detection/grabber.py
+import time
+import logging
+import threading
+from urllib.parse import urlparse
+
+import cv2
+
+from app.config import Config
+from app.metrics import FRAMES_DROPPED, SOURCE_RECONNECTS
+
+log = logging.getLogger(__name__)
+
+_dropped = FRAMES_DROPPED.labels(queue="grabber")
+
+
+def is_network_source(source):
+    """True for URL sources (http(s), rtsp, rtmp, ...), which can stall and come back."""
+    if not isinstance(source, str):
+        return False
+    scheme = urlparse(source).scheme
+    return len(scheme) > 1 and scheme != "file"  # one letter is a Windows drive
+
+
+def open_capture(source, timeout=None):
+    """
+    cv2.VideoCapture for a webcam index, URL or path. Network sources get
+    open/read timeouts (OpenCV >= 4.6), so a dead stream fails a read
+    instead of blocking forever.
+    """
+    timeout = Config.SOURCE_TIMEOUT if timeout is None else timeout
+    if isinstance(source, str) and source.isdigit():
+        source = int(source)
+    if isinstance(source, str) and timeout > 0 and hasattr(cv2, "CAP_PROP_READ_TIMEOUT_MSEC"):
+        ms = int(timeout * 1000)
+        return cv2.VideoCapture(source, cv2.CAP_ANY,
+                                [cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, ms, cv2.CAP_PROP_READ_TIMEOUT_MSEC, ms])
+    return cv2.VideoCapture(source)
+
+
+class LatestFrameGrabber:
+    """
+    cv2.VideoCapture look-alike that decodes on its own thread and keeps
+    only the newest frame, so OpenCV's internal buffer never fills up while
+    inference is slower than the source and the verdict stays current.
+
+    `opener()` returns an opened capture; it is called again on every
+    reconnect, so it can re-resolve expiring stream URLs. Network sources
+    (`network=True`, or a URL passed to `from_source`) and live ones (no
+    frame count: webcams, RTSP, HLS) reconnect with exponential backoff
+    when a read fails; the consumer just sees `read()` time out meanwhile,
+    with `alive` still True. A network source with a frame count (a VOD,
+    HTTP mp4) ends only once its last frame was read; after a stall it
+    reopens and seeks back to where it stopped. Local files end at EOF
+    and, with `pace` (default Config.SOURCE_PACE), are played at their
+    native frame rate so latency behaviour can be tested offline.
+
+    `frame_time` is the wall-clock time the frame last returned by
+    `read()` was decoded (for paced files, when it was due) and
+    `frame_decode_s` how long reading and decoding it took. With
+    `open_async` the first open also happens on the reader thread, so a
+    slow opener (e.g. URL resolution) doesn't block the caller; if it
+    fails, `error` says why and the grabber ends.
+    """
+
+    def __init__(self, opener, pace=None, backoff=None, max_retries=None, name="source", open_async=False,
+                 network=False):
+        self.opener = opener
+        self.name = name
+        self.network = network
+        self.backoff_min, self.backoff_max = backoff or (Config.SOURCE_BACKOFF_MIN, Config.SOURCE_BACKOFF_MAX)
+        self.max_retries = Config.SOURCE_MAX_RETRIES if max_retries is None else max_retries
+        self.frames_read = 0
+        self.frames_dropped = 0
+        self.reconnects = 0
+        self.frame_time = None
+        self.frame_decode_s = None
+        self.error = None
+        self.live = None
+        self.paced = False
+        self.fps = 30.0
+        self.position_ms = 0.0  # of the last frame read, to resume a VOD after reconnecting
+        self.state = "opening"  # opening -> live | reconnecting -> ended
+        self._cond = threading.Condition()
+        self._closed = threading.Event()
+        self._frame = None
+        self._captured = None
+        self._decode_s = None
+        self._seq = 0
+        self._taken = 0
+        self._thread = None
+        self._cap = None
+        self._pace = pace
+        self._barren = 0  # reconnects since the last frame read
+
+        if open_async or self._open():
+            self._thread = threading.Thread(target=self._run, name=f"grabber-{name}", daemon=True)
+            self._thread.start()
+
+    @classmethod
+    def from_source(cls, source, **kwargs):
+        kwargs.setdefault("network", is_network_source(source))
+        return cls(lambda: open_capture(source), **kwargs)
+
+    # ---------- cv2.VideoCapture interface ----------
+    @property
+    def alive(self):
+        """Still producing (or reconnecting to) frames."""
+        return self.state != "ended" and not self._closed.is_set()
+
+    def isOpened(self):
+        return self.alive
+
+    def read(self, timeout=0.5):
+        """(True, newest frame) once one newer than the last read arrives, else (False, None)."""
+        with self._cond:
+            if self._seq == self._taken and self.alive:
+                self._cond.wait(timeout)
+            if self._seq == self._taken:
+                return False, None
+            self._taken = self._seq
+            self.frame_time = self._captured
+            self.frame_decode_s = self._decode_s
+            return True, self._frame
+
+    def get(self, prop):
+        cap = self._cap
+        return cap.get(prop) if cap is not None else 0.0
+
+    def release(self, timeout=1.0):
+        self._closed.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        elif self._cap is not None:
+            self._cap.release()
+
+    def stats(self):
+        data = {"state": self.state, "read": self.frames_read, "dropped": self.frames_dropped,
+                "reconnects": self.reconnects}
+        if self.live is not None:
+            data.update(live=self.live, network=self.network, paced=self.paced, source_fps=round(self.fps, 2))
+        if self.error:
+            data["error"] = self.error
+        return data
+
+    def _open(self):
+        try:
+            cap = self.opener()
+        except Exception as e:
+            log.warning("Could not open source: %s", e, extra={"source": self.name})
+            self.error = f"Failed to open source: {e}"
+            self.state = "ended"
+            return False
+        if not cap.isOpened():
+            cap.release()
+            self.error = "Failed to open source"
+            self.state = "ended"
+            return False
+        self._cap = cap
+        self.live = cap.get(cv2.CAP_PROP_FRAME_COUNT) <= 0
+        self.fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        pace = self._pace
+        if pace is None:
+            pace = Config.SOURCE_PACE == "1" or (Config.SOURCE_PACE == "auto" and not self.live)
+        self.paced = bool(pace)
+        self.state = "live"
+        return True
+
+    # ---------- reader thread ----------
+    def _run(self):
+        if self._cap is None and not self._open():
+            with self._cond:
+                self._cond.notify_all()
+            return
+        cap = self._cap
+        started = time.monotonic()
+        played = 0
+        try:
+            while not self._closed.is_set():
+                start = time.perf_counter()
+                ok, frame = cap.read()
+                decode_s = time.perf_counter() - start
+                if not ok:
+                    if not (self.live or self.network) or self._at_end(cap):
+                        log.info("Source ended", extra={"source": self.name, "frames": self.frames_read})
+                        break
+                    log.warning("Source stalled, reconnecting", extra={"source": self.name})
+                    cap.release()
+                    cap = self._cap = self._reconnect()
+                    if cap is None:
+                        break
+                    started, played = time.monotonic(), 0  # restart the pacing schedule
+                    continue
+                self._barren = 0
+                if self.network and not self.live:
+                    self.position_ms = cap.get(cv2.CAP_PROP_POS_MSEC)
+                if self.paced:
+                    # wall-clock schedule, so decode time doesn't accumulate as drift
+                    played += 1
+                    if self._closed.wait(max(0.0, started + played / self.fps - time.monotonic())):
+                        break
+                self._publish(frame, decode_s)
+        finally:
+            self.state = "ended"
+            if cap is not None:
+                cap.release()
+            with self._cond:
+                self._cond.notify_all()
+
+    def _at_end(self, cap):
+        """Whether a failed read on a VOD is its real end rather than a stall."""
+        if self.live:
+            return False
+        frames = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+        position = cap.get(cv2.CAP_PROP_POS_FRAMES) or self.position_ms / 1000.0 * self.fps
+        return frames > 0 and position >= frames - 1
+
+    def _publish(self, frame, decode_s=None):
+        with self._cond:
+            if self._seq != self._taken:
+                self.frames_dropped += 1
+                _dropped.inc()
+            self._frame = frame
+            self._captured = time.time()
+            self._decode_s = decode_s
+            self._seq += 1
+            self.frames_read += 1
+            self._cond.notify_all()
+
+    def _reconnect(self):
+        self.state = "reconnecting"
+        # a source that opens but never yields a frame keeps counting towards
+        # max_retries (and the backoff) instead of starting over each time
+        attempt = self._barren
+        while not self.max_retries or attempt < self.max_retries:
+            delay = min(self.backoff_max, self.backoff_min * 2 ** attempt)
+            if self._closed.wait(delay):
+                return None
+            attempt += 1
+            self.reconnects += 1
+            try:
+                cap = self.opener()
+            except Exception as e:
+                log.warning("Reconnect failed: %s", e, extra={"source": self.name, "attempt": attempt})
+                SOURCE_RECONNECTS.labels(result="failed").inc()
+                continue
+            if cap.isOpened():
+                if not self.live and self.position_ms > 0:
+                    cap.set(cv2.CAP_PROP_POS_MSEC, self.position_ms)  # VOD: carry on where it stalled
+                log.info("Source reconnected", extra={"source": self.name, "attempt": attempt,
+                                                      "position_ms": round(self.position_ms)})
+                SOURCE_RECONNECTS.labels(result="ok").inc()
+                self.state = "live"
+                self._barren = attempt
+                return cap
+            cap.release()
+            SOURCE_RECONNECTS.labels(result="failed").inc()
+            log.warning("Reconnect failed", extra={"source": self.name, "attempt": attempt})
+        log.error("Giving up on source", extra={"source": self.name, "attempts": attempt})
+        return None
@@ -0,0 +1,228 @@
+# app/detection/jobs.py
+import time
+import uuid
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from app.config import Config
+from app.detection.sampling import sample_frames
+from app.metrics import UPLOAD_DECODE, UPLOAD_LATENCY, JOBS_FINISHED
+
+log = logging.getLogger(__name__)
+
+
+class QueueFull(Exception):
+    """Raised when too many upload jobs are already waiting or running."""
+
+
+class Job:
+    """
+    One uploaded video: queued (reported as "decoding" once a pool process
+    picks it up) -> scoring -> done | failed | cancelled. "segments" jobs
+    decode and score together and go straight from queued to scoring.
+    """
+
+    ACTIVE = ("queued", "scoring")
+
+    def __init__(self, owner, path, filename, content_hash=None, mode="sample"):
+        self.id = uuid.uuid4().hex
+        self.owner = owner
+        self.mode = mode
+        self.path = path
+        self.filename = filename
+        self.content_hash = content_hash
+        self.state = "queued"
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+        self.future = None
+
+    @property
+    def active(self):
+        return self.state in self.ACTIVE
+
+    def to_dict(self):
+        state = self.state
+        if state == "queued" and self.future is not None and self.future.running():
+            state = "decoding"
+        data = {"job_id": self.id, "filename": self.filename, "mode": self.mode, "state": state,
+                "created": self.created, "finished": self.finished}
+        if self.result is not None:
+            data.update(self.result)
+        if self.error:
+            data["error"] = self.error
+        return data
+
+
+def _decode(path, seq_len, size, strategy):
+    """Runs in a pool process: sample the clip to a small uint8 array. Returns (frames, seconds)."""
+    start = time.perf_counter()
+    frames = sample_frames(path, seq_len, size, strategy=strategy)
+    return frames, time.perf_counter() - start
+
+
+class JobManager:
+    """
+    Asynchronous upload analysis.
+
+    Decoding runs in a bounded process pool (spawned, so children never
+    inherit TensorFlow state); the sampled frames come back to this process
+    and are scored by `score_fn(frames) -> (label, confidence)`, which goes
+    through the shared batching server instead of a model copy per process.
+    `notify(job)` is called on every state change. Uploads are left on
+    disk; the caller owns them (they're content-addressed and may be shared).
+
+    "segments" jobs run `segment_fn(path, cancelled, **options) -> result
+    dict` on a
+    scoring thread instead, since dense scoring decodes and scores in one
+    streaming pass.
+    """
+
+    def __init__(self, score_fn, notify=None, workers=2, max_pending=8, result_ttl=600.0,
+                 seq_len=30, size=(64, 64), segment_fn=None):
+        self.score_fn = score_fn
+        self.segment_fn = segment_fn
+        self.notify = notify
+        self.workers = workers
+        self.max_pending = max_pending
+        self.result_ttl = result_ttl
+        self.seq_len = seq_len
+        self.size = size
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._decoders = None
+        self._scorers = None
+
+    @classmethod
+    def from_config(cls, score_fn, notify=None, segment_fn=None):
+        return cls(score_fn, notify, Config.JOB_WORKERS, Config.JOB_MAX_PENDING, Config.JOB_RESULT_TTL,
+                   Config.SEQUENCE_LENGTH, (Config.IMG_WIDTH, Config.IMG_HEIGHT), segment_fn)
+
+    def pending(self):
+        with self._lock:
+            return self._active()
+
+    def _active(self):
+        # caller holds self._lock
+        return sum(1 for job in self._jobs.values() if job.active)
+
+    def uses(self, content_hash):
+        """True while an active job still reads the upload stored as `content_hash`."""
+        with self._lock:
+            return any(job.active and job.content_hash == content_hash for job in self._jobs.values())
+
+    def submit(self, owner, path, filename, content_hash=None, mode="sample", options=None):
+        if mode == "segments" and self.segment_fn is None:
+            raise ValueError("Segment scoring is not available")
+        self._prune()
+        with self._lock:
+            if self._active() >= self.max_pending:
+                raise QueueFull(f"{self.max_pending} uploads are already being analysed, try again shortly")
+            if self._decoders is None:
+                self._decoders = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+                self._scorers = ThreadPoolExecutor(self.workers, thread_name_prefix="job-score")
+            job = Job(owner, path, filename, content_hash, mode)
+            self._jobs[job.id] = job
+            if mode == "segments":
+                job.future = self._scorers.submit(self._run_segments, job, options or {})
+            else:
+                job.future = self._decoders.submit(_decode, path, self.seq_len, self.size, Config.SAMPLER_STRATEGY)
+        if mode != "segments":
+            job.future.add_done_callback(lambda f: self._on_decoded(job, f))
+        self._notify(job)
+        return job
+
+    def get(self, job_id, owner=None):
+        job = self._jobs.get(job_id)
+        if job is None or (owner is not None and job.owner != owner):
+            return None
+        return job
+
+    def cancel(self, job_id, owner=None):
+        """Cancel a job; a decode that already started finishes but is discarded."""
+        job = self.get(job_id, owner)
+        if job is None or not job.active:
+            return job
+        job.future.cancel()
+        self._set_state(job, "cancelled")
+        return job
+
+    def shutdown(self):
+        if self._decoders is not None:
+            self._decoders.shutdown(wait=False, cancel_futures=True)
+            self._scorers.shutdown(wait=False)
+
+    # ---------- internals ----------
+    def _on_decoded(self, job, future):
+        # runs on the pool's management thread - hand scoring off right away
+        try:
+            self._scorers.submit(self._finish, job, future)
+        except RuntimeError:  # interpreter/pool shutting down
+            pass
+
+    def _finish(self, job, future):
+        try:
+            if job.state == "cancelled" or future.cancelled():
+                return
+            frames, decode_s = future.result()
+            UPLOAD_DECODE.observe(decode_s)
+            if frames is None or len(frames) < self.seq_len:
+                job.error = "Not enough frames"
+                self._set_state(job, "failed")
+                return
+            self._set_state(job, "scoring")
+            label, confidence = self.score_fn(frames)
+            if job.state == "cancelled":
+                return
+            job.result = {"result": label, "confidence": round(float(confidence), 2)}
+            self._set_state(job, "done")
+        except Exception as e:
+            log.exception("Job failed", extra={"job_id": job.id[:8]})
+            job.error = str(e)
+            self._set_state(job, "failed")
+
+    def _run_segments(self, job, options):
+        try:
+            if job.state == "cancelled":
+                return
+            self._set_state(job, "scoring")
+            result = self.segment_fn(job.path, lambda: job.state == "cancelled", **options)
+            if job.state == "cancelled":
+                return
+            if result is None:
+                job.error = "Not enough frames"
+                self._set_state(job, "failed")
+                return
+            job.result = result
+            self._set_state(job, "done")
+        except Exception as e:
+            log.exception("Job failed", extra={"job_id": job.id[:8]})
+            job.error = str(e)
+            self._set_state(job, "failed")
+
+    def _set_state(self, job, state):
+        job.state = state
+        if not job.active:
+            job.finished = time.time()
+            JOBS_FINISHED.labels(state=state).inc()
+            if state == "done":
+                UPLOAD_LATENCY.labels(mode=job.mode).observe(job.finished - job.created)
+            log.info("Job %s", state, extra={"job_id": job.id[:8], "mode": job.mode,
+                                             "seconds": round(job.finished - job.created, 3)})
+        self._notify(job)
+
+    def _notify(self, job):
+        if self.notify is not None:
+            try:
+                self.notify(job)
+            except Exception as e:
+                log.warning("Job notify failed: %s", e)
+
+    def _prune(self):
+        cutoff = time.time() - self.result_ttl
+        with self._lock:
+            for job_id in [j.id for j in self._jobs.values() if j.finished and j.finished < cutoff]:
+                del self._jobs[job_id]
@@ -0,0 +1,52 @@
+# app/detection/overlay.py
+import time
+import threading
+
+
+class OverlayPublisher:
+    """
+    Pushes a stream's label/confidence/fps to its Socket.IO room.
+
+    A new label, or a confidence move of at least `min_delta`, is pushed
+    straight away unless the room got an update less than `min_interval`
+    seconds ago; then it is held and merged into the next push, so a burst
+    of predictions costs one message. Calls with nothing new (the periodic
+    fps refresh) also flush whatever is pending.
+    """
+
+    FIELDS = ("label", "confidence", "fps", "inference_fps", "latency_ms", "error")
+
+    def __init__(self, emit, room, min_interval=0.2, min_delta=0.01):
+        self.emit = emit
+        self.room = room
+        self.min_interval = min_interval
+        self.min_delta = min_delta
+        self.sent = 0
+        self.coalesced = 0
+        self._last = {}
+        self._last_emit = 0.0
+        self._pending = False
+        self._lock = threading.Lock()
+
+    def _changed(self, info):
+        if info.get("label") != self._last.get("label"):
+            return True
+        return abs(info.get("confidence", 0.0) - self._last.get("confidence", 0.0)) >= self.min_delta
+
+    def update(self, info, force=False, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            if self._changed(info):
+                self._pending = True
+            if not (self._pending or force):
+                return False
+            if now - self._last_emit < self.min_interval:
+                self.coalesced += 1
+                return False
+            payload = {key: info.get(key) for key in self.FIELDS}
+            self._last = payload
+            self._last_emit = now
+            self._pending = False
+            self.sent += 1
+        self.emit(payload, self.room)
+        return True
@@ -0,0 +1,300 @@
+# app/detection/pipeline.py
+import time
+import logging
+import threading
+from collections import deque
+
+import cv2
+
+from app.config import Config
+from app.detection.window import FrameWindow
+from app.detection.scheduler import InferenceScheduler
+from app.detection.broadcast import FrameBroadcaster
+from app.detection.encoding import JpegEncoder
+from app.detection.faces import FaceCropper
+from app.detection.gating import ChangeGate
+from app.metrics import STAGE_LATENCY, FRAMES_DROPPED, VERDICT_LATENCY
+
+log = logging.getLogger(__name__)
+
+
+class DropOldestQueue:
+    """
+    Bounded hand-off between pipeline stages. A put on a full queue evicts
+    the oldest item instead of blocking the producer.
+    """
+
+    def __init__(self, maxsize=2, name=None):
+        self.maxsize = maxsize
+        self.dropped = 0
+        self._dropped_total = FRAMES_DROPPED.labels(queue=name) if name else None
+        self._items = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def put(self, item):
+        with self._cond:
+            if len(self._items) >= self.maxsize:
+                self._items.popleft()
+                self.dropped += 1
+                if self._dropped_total is not None:
+                    self._dropped_total.inc()
+            self._items.append(item)
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """Next item, or None on timeout / once the queue is closed and empty."""
+        with self._cond:
+            if not self._items and not self._closed:
+                self._cond.wait(timeout)
+            if not self._items:
+                return None
+            return self._items.popleft()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def qsize(self):
+        return len(self._items)
+
+
+class StageStats:
+    """
+    Per-stage latency (moving average) and throughput counters, also fed
+    to the process-wide latency histogram for /metrics.
+    """
+
+    def __init__(self, name, alpha=0.1, histogram=None):
+        self.name = name
+        self.alpha = alpha
+        self._histogram = histogram or STAGE_LATENCY.labels(stage=name)
+        self.count = 0
+        self.last_ms = 0.0
+        self.avg_ms = 0.0
+
+    def record(self, seconds):
+        ms = seconds * 1000.0
+        self.last_ms = ms
+        self.avg_ms = ms if self.count == 0 else self.avg_ms + self.alpha * (ms - self.avg_ms)
+        self.count += 1
+        self._histogram.observe(seconds)
+
+    def as_dict(self, queue=None):
+        data = {"latency_ms": round(self.avg_ms, 2), "last_ms": round(self.last_ms, 2), "count": self.count}
+        if queue is not None:
+            data["queue"] = queue.qsize()
+            data["dropped"] = queue.dropped
+        return data
+
+
+class StreamPipeline:
+    """
+    Live detection as three threads joined by bounded drop-oldest queues:
+
+      capture   -> reads frames, fills the sliding window, hands scheduled
+                   windows to inference and every frame to the annotator
+      inference -> scores windows with `predict_fn(batch) -> (label, prob)`
+      annotate  -> draws the latest label and publishes the frame to every
+                   viewer through `broadcaster`, which JPEG-encodes it once
+                   per output profile actually being watched
+
+    A slow model never stalls frame reads; the annotator simply reuses the
+    last label. `cap` may be a LatestFrameGrabber, whose reads time out
+    while it reconnects without ending the stream; `info["latency_ms"]` is
+    the glass-to-verdict time of the newest frame in the last scored window.
+
+    `on_update(info, force)` is called after every prediction and, with
+    force=True, on the once-a-second fps refresh. With a `cropper` (by
+    default from Config.FACE_CROP) the capture stage crops each frame to
+    the tracked face before it goes into the window, and with a `gate`
+    (default from Config.CHANGE_GATE) windows that barely changed since the
+    last prediction are not scored again. With an `incremental` scorer
+    (app/incremental.py) only the frames that entered the window since the
+    last prediction go through the CNN; `predict_fn` is the fallback while
+    no split model is available.
+    """
+
+    def __init__(self, cap, predict_fn, window=None, scheduler=None, queue_size=2, on_update=None,
+                 cropper=None, gate=None, incremental=None):
+        self.cap = cap
+        self.predict_fn = predict_fn
+        self.on_update = on_update
+        self.window = window or FrameWindow()
+        self.scheduler = scheduler or InferenceScheduler.from_config()
+        self.cropper = cropper or FaceCropper.from_config()
+        self.gate = gate or ChangeGate.from_config()
+        self.incremental = incremental
+        self.info = {"label": "WAITING", "confidence": 0.0, "fps": 0.0, "inference_fps": 0.0, "latency_ms": None}
+        self.broadcaster = FrameBroadcaster(JpegEncoder(Config.JPEG_BACKEND))
+
+        self._stop = threading.Event()
+        self._infer_queue = DropOldestQueue(1, "inference")
+        self._annotate_queue = DropOldestQueue(queue_size, "annotate")
+        self._stats = {name: StageStats(name)
+                       for name in ("capture", "preprocess", "face", "inference", "annotate")}
+        self._stats["verdict"] = StageStats("verdict", histogram=VERDICT_LATENCY)
+        self._threads = []
+
+    @property
+    def latest_frame(self):
+        return self.broadcaster.latest()[1]
+
+    @property
+    def running(self):
+        return not self._stop.is_set() and any(t.is_alive() for t in self._threads)
+
+    def start(self):
+        for name, target in (("capture", self._capture_loop),
+                             ("inference", self._inference_loop),
+                             ("annotate", self._annotate_loop)):
+            t = threading.Thread(target=target, name=f"pipeline-{name}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        return self
+
+    def stop(self, timeout=1.0):
+        """Signal all stages, wait for them and release the capture."""
+        self._stop.set()
+        self._infer_queue.close()
+        self._annotate_queue.close()
+        self.broadcaster.close()
+        for t in self._threads:
+            if t is not threading.current_thread():
+                t.join(timeout=timeout)
+        self._threads = []
+        if self.cap is not None and self.cap.isOpened():
+            self.cap.release()
+
+    def queue_depths(self):
+        """Frames waiting between stages: {"inference": n, "annotate": n}."""
+        return {"inference": self._infer_queue.qsize(), "annotate": self._annotate_queue.qsize()}
+
+    def stats(self):
+        data = {
+            "capture": self._stats["capture"].as_dict(),
+            "preprocess": self._stats["preprocess"].as_dict(),
+            "inference": dict(self._stats["inference"].as_dict(self._infer_queue),
+                              incremental=self.incremental is not None and self.incremental.active),
+            "annotate": self._stats["annotate"].as_dict(self._annotate_queue),
+            "broadcast": self.broadcaster.stats(),
+            "verdict": self._stats["verdict"].as_dict(),
+        }
+        if hasattr(self.cap, "stats"):
+            data["source"] = self.cap.stats()
+        if self.gate is not None:
+            data["gate"] = self.gate.stats()
+        if self.cropper is not None:
+            data["face"] = dict(self._stats["face"].as_dict(), **self.cropper.stats())
+        return data
+
+    def _notify(self, force=False):
+        if self.on_update is None:
+            return
+        try:
+            self.on_update(self.info, force)
+        except Exception as e:
+            log.warning("Overlay update failed: %s", e)
+
+    # ---------- stages ----------
+    def _capture_loop(self):
+        log.info("Capture stage started")
+        stats = self._stats["capture"]
+        preprocess = self._stats["preprocess"]
+        last_time = time.time()
+        frame_count = 0
+        while not self._stop.is_set() and self.cap.isOpened():
+            t0 = time.perf_counter()
+            success, frame = self.cap.read()
+            if not success:
+                if getattr(self.cap, "alive", False):
+                    continue  # grabber waiting for a frame or reconnecting
+                log.warning("Failed to read frame")
+                break
+            captured = getattr(self.cap, "frame_time", None) or time.time()
+            t1 = time.perf_counter()
+            # a grabber's read() mostly waits for the next frame; its own
+            # decode time is the capture cost
+            decode_s = getattr(self.cap, "frame_decode_s", None)
+            stats.record(t1 - t0 if decode_s is None else decode_s)
+            if self.cropper is not None:
+                t1 = time.perf_counter()
+                self.window.push(self.cropper.crop(frame), bgr_to_rgb=True)
+                self._stats["face"].record(time.perf_counter() - t1)
+            else:
+                self.window.push(frame, bgr_to_rgb=True)
+            if self.gate is not None:
+                self.gate.observe(self.window)
+            preprocess.record(time.perf_counter() - t1)
+            if (self.window.is_full and self.scheduler.should_run()
+                    and (self.gate is None or self.gate.allow())):
+                self.scheduler.started()
+                self._infer_queue.put((self.window.as_batch(), self.window.pushed, captured))
+            self._annotate_queue.put(frame)
+
+            frame_count += 1
+            # Calculate FPS every 1 second
+            now = time.time()
+            if now - last_time >= 1.0:
+                self.info["fps"] = frame_count / (now - last_time)
+                self.info["inference_fps"] = self.scheduler.update_rate(now)
+                frame_count = 0
+                last_time = now
+                self._notify(force=True)
+        error = getattr(self.cap, "error", None)
+        if error:  # e.g. a source opened in the background that never came up
+            self.info["error"] = error
+            self._notify(force=True)
+        self._stop.set()
+        self._infer_queue.close()
+        self._annotate_queue.close()
+        log.info("Capture stage exited")
+
+    def _inference_loop(self):
+        stats = self._stats["inference"]
+        while not self._stop.is_set():
+            item = self._infer_queue.get(timeout=0.5)
+            if item is None:
+                continue
+            batch, pushed, captured = item
+            t0 = time.perf_counter()
+            try:
+                prob = self.incremental.predict(batch, pushed) if self.incremental is not None else None
+                if prob is None:
+                    label, confidence = self.predict_fn(batch)
+                else:
+                    label, confidence = ("FAKE" if prob > 0.5 else "REAL"), prob
+                self.info["label"] = label
+                self.info["confidence"] = float(confidence)
+                verdict = self._stats["verdict"]
+                verdict.record(time.time() - captured)
+                self.info["latency_ms"] = round(verdict.last_ms, 1)
+            except Exception:
+                log.exception("Prediction failed")
+                continue  # no new verdict, so nothing to report
+            finally:
+                stats.record(time.perf_counter() - t0)
+                self.scheduler.finished()
+                self.info["inference_fps"] = self.scheduler.inference_fps
+            self._notify()
+
+    def _annotate_loop(self):
+        stats = self._stats["annotate"]
+        while not self._stop.is_set():
+            frame = self._annotate_queue.get(timeout=0.5)
+            if frame is None:
+                continue
+            t0 = time.perf_counter()
+            label, confidence = self.info["label"], self.info["confidence"]
+            text = f"{label} ({confidence:.2f})"
+            color = (0, 255, 0) if label == "REAL" else (0, 0, 255)
+            cv2.putText(frame, text, (10, 30),
+                        cv2.FONT_HERSHEY_SIMPLEX, 1, color, 2)
+            box = self.cropper.box if self.cropper is not None else None
+            if box is not None:
+                cv2.rectangle(frame, box[:2], box[2:], color, 2)
+            self.broadcaster.publish(frame)
+            stats.record(time.perf_counter() - t0)
+        # source ended or stream stopped: wake viewers so they can finish
+        self.broadcaster.close()
@@ -0,0 +1,51 @@
+# app/detection/preprocess.py
+"""
+Frame preprocessing shared by every upload and live path.
+
+Frames go to the model as uint8 RGB at model size, (N, seq_len, H, W, 3).
+Scaling to [0, 1] happens exactly once, inside the compiled predictors
+(see `scaled_forward` in app/predictor.py), so batches crossing threads,
+queues and processes are a quarter of the float32 size.
+"""
+import cv2
+import numpy as np
+
+INPUT_DTYPE = np.uint8
+INPUT_SCALE = 1.0 / 255.0
+
+
+def resize_into(frame, out, size, bgr_to_rgb=True):
+    """Resize a decoded BGR frame straight into the preallocated uint8 slot `out`."""
+    if frame.shape[:2] == out.shape[:2]:
+        np.copyto(out, frame)
+    else:
+        cv2.resize(frame, size, dst=out)
+    if bgr_to_rgb:
+        cv2.cvtColor(out, cv2.COLOR_BGR2RGB, dst=out)
+    return out
+
+
+def pad_sequence(frames, seq_len):
+    """Zero-pad (or truncate) (n, H, W, 3) uint8 frames to exactly `seq_len`."""
+    if len(frames) == seq_len:
+        return frames
+    out = np.zeros((seq_len,) + frames.shape[1:], dtype=INPUT_DTYPE)
+    out[:min(len(frames), seq_len)] = frames[:seq_len]
+    return out
+
+
+def to_uint8(batch):
+    """
+    Model input as uint8. Float batches already scaled to [0, 1] (older
+    callers) are mapped back, which is lossless for frames that started out
+    as uint8.
+    """
+    batch = np.asarray(batch)
+    if batch.dtype == INPUT_DTYPE:
+        return batch
+    return np.clip(np.rint(batch * 255.0), 0, 255).astype(INPUT_DTYPE)
+
+
+def normalize(batch):
+    """float32 in [0, 1], for feeding a raw Keras model directly."""
+    return np.multiply(batch, INPUT_SCALE, dtype=np.float32)
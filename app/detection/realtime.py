@@ -1,15 +1,20 @@
 # app/detection/realtime.py
-import cv2
-import numpy as np
 import time
 import threading
 from app.extensions import socketio
 from app.config import Config
-from app.models import predict_batch, get_model
+from app.models import predict_batch, registry
+from app.detection.window import FrameWindow
+from app.detection.faces import FaceCropper
+from app.detection.gating import ChangeGate
+from app.detection.sessions import AdmissionError
+from app.detection.grabber import LatestFrameGrabber
+from app.incremental import IncrementalScorer
 
 class RealTimeWorker:
-    def __init__(self, source=0):
+    def __init__(self, source=0, room=None):
         self.source = source
+        self.room = room  # Socket.IO room (client sid) results are sent to
         self.thread = None
         self.running = False
         self.lock = threading.Lock()
@@ -28,14 +33,17 @@ class RealTimeWorker:
             self.thread = None
 
     def _run(self):
-        cap = cv2.VideoCapture(self.source)
+        cap = LatestFrameGrabber.from_source(self.source, name=str(self.source))
         seq_len = Config.SEQUENCE_LENGTH
         H, W = Config.IMG_HEIGHT, Config.IMG_WIDTH
-        buffer = []
+        window = FrameWindow(seq_len, (W, H))
+        cropper = FaceCropper.from_config()
+        gate = ChangeGate.from_config()
+        incremental = IncrementalScorer(registry.get_split)
 
         # Skip if cannot open
         if not cap.isOpened():
-            socketio.emit("realtime_error", {"msg": f"Cannot open video source {self.source}"})
+            socketio.emit("realtime_error", {"msg": f"Cannot open video source {self.source}"}, to=self.room)
             self.running = False
             return
 
@@ -43,35 +51,49 @@ class RealTimeWorker:
             while self.running:
                 ret, frame = cap.read()
                 if not ret:
+                    if cap.alive:
+                        continue  # reconnecting
                     break
 
-                # preprocess frame
-                frame = cv2.resize(frame, (W, H))
-                frame = frame[..., ::-1]  # BGR->RGB if needed (we treat as generic)
-                frame = frame.astype("float32") / 255.0
-                buffer.append(frame)
+                # preprocess frame: resize + BGR->RGB straight into the window
+                window.push(cropper.crop(frame) if cropper is not None else frame, bgr_to_rgb=True)
+                if gate is not None:
+                    gate.observe(window)
 
-                if len(buffer) >= seq_len:
-                    window = np.array(buffer[-seq_len:])  # last seq_len frames
-                    batch = np.expand_dims(window, axis=0)  # shape (1, seq_len, H, W, 3)
-                    preds = predict_batch(batch)
-                    # preds is shape (1, num_classes)
-                    class_id = int(np.argmax(preds[0]))
-                    confidence = float(np.max(preds[0]))
-                    socketio.emit("confidence_score", {"class": int(class_id), "confidence": confidence})
+                # unchanged window: the client keeps the last score it got
+                if window.is_full and (gate is None or gate.allow()):
+                    batch = window.as_batch()  # (1, seq_len, H, W, 3)
+                    prob = incremental.predict(batch, window.pushed)
+                    if prob is None:
+                        # preds is shape (1, 1): probability the window is fake
+                        prob = float(predict_batch(batch)[0][0])
+                    class_id = int(prob > 0.5)
+                    confidence = prob if class_id else 1.0 - prob
+                    socketio.emit("confidence_score", {"class": int(class_id), "confidence": confidence,
+                                                       "latency_ms": round((time.time() - cap.frame_time) * 1000.0, 1)},
+                                  to=self.room)
                 # limit CPU usage
                 time.sleep(0.02)
         finally:
             cap.release()
             self.running = False
 
-# keep a single worker per app
-_worker = None
+# one worker per client connection, keyed by Socket.IO sid
+_workers = {}
 _worker_lock = threading.Lock()
 
-def get_worker():
-    global _worker
+def get_worker(key):
     with _worker_lock:
-        if _worker is None:
-            _worker = RealTimeWorker()
-        return _worker
+        worker = _workers.get(key)
+        if worker is None:
+            if len(_workers) >= Config.MAX_STREAMS:
+                raise AdmissionError(f"Server is at its limit of {Config.MAX_STREAMS} real-time workers")
+            worker = RealTimeWorker(room=key)
+            _workers[key] = worker
+        return worker
+
+def release_worker(key):
+    with _worker_lock:
+        worker = _workers.pop(key, None)
+    if worker is not None:
+        worker.stop()
@@ -0,0 +1,149 @@
+# app/detection/resolver.py
+import re
+import time
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from urllib.parse import urlparse, parse_qs
+
+from app.config import Config
+from app.metrics import RESOLVER_LOOKUPS, RESOLVE_LATENCY
+
+log = logging.getLogger(__name__)
+
+_YOUTUBE_ID = re.compile(r"(?:v=|youtu\.be/|/shorts/|/embed/|/live/)([A-Za-z0-9_-]{11})")
+_PATH_EXPIRE = re.compile(r"/expire/(\d+)")
+
+
+def canonical(url):
+    """(cache key, URL to extract from): YouTube links collapse to their video id."""
+    url = url.strip()
+    match = _YOUTUBE_ID.search(url) if "youtu" in url else None
+    if match:
+        video_id = match.group(1)
+        return f"youtube:{video_id}", f"https://www.youtube.com/watch?v={video_id}"
+    return url.split("#", 1)[0], url
+
+
+def url_expiry(media_url):
+    """Expiry (unix time) signed into a media URL, e.g. googlevideo's `expire=`, or None."""
+    parsed = urlparse(media_url)
+    values = parse_qs(parsed.query).get("expire")
+    if values and values[0].isdigit():
+        return float(values[0])
+    match = _PATH_EXPIRE.search(parsed.path)  # HLS manifests carry it in the path
+    return float(match.group(1)) if match else None
+
+
+class YtDlpExtractor:
+    """Default extractor: one reused YoutubeDL per pool thread, metadata only."""
+
+    def __init__(self, options=None):
+        self.options = options or {"format": "best[ext=mp4]/best", "quiet": True, "noplaylist": True}
+        self._local = threading.local()
+
+    def __call__(self, url):
+        ydl = getattr(self._local, "ydl", None)
+        if ydl is None:
+            import yt_dlp
+            ydl = self._local.ydl = yt_dlp.YoutubeDL(self.options)
+        info = ydl.extract_info(url, download=False)
+        return info["url"]
+
+
+class StreamResolver:
+    """
+    Page URL -> direct media URL, for live URL sources.
+
+    `extractor(url) -> media_url` (yt_dlp by default; tests can pass a
+    local stand-in) runs on a small background pool. Results are cached
+    per canonical video id until the expiry signed into the media URL
+    minus `margin` seconds, or `ttl` seconds if it has none. Concurrent
+    lookups of one id share a single extraction, and `prefetch()` starts
+    one without waiting, so the stream start doesn't block on it.
+    """
+
+    def __init__(self, extractor=None, workers=None, ttl=None, margin=None, max_entries=None):
+        self.extractor = extractor or YtDlpExtractor()
+        self.workers = workers or Config.RESOLVER_WORKERS
+        self.ttl = Config.RESOLVER_TTL if ttl is None else ttl
+        self.margin = Config.RESOLVER_EXPIRY_MARGIN if margin is None else margin
+        self.max_entries = max_entries or Config.RESOLVER_MAX_ENTRIES
+        self.hits = 0
+        self.misses = 0
+        self.joined = 0
+        self._cache = OrderedDict()  # key -> (media_url, valid_until)
+        self._inflight = {}  # key -> Future
+        self._lock = threading.Lock()
+        self._pool = None
+
+    def resolve_async(self, url):
+        """Future for the media URL of `url`; already resolved if cached."""
+        key, page_url = canonical(url)
+        now = time.time()
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and cached[1] > now:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                RESOLVER_LOOKUPS.labels(result="hit").inc()
+                future = Future()
+                future.set_result(cached[0])
+                return future
+            future = self._inflight.get(key)
+            if future is not None:
+                self.joined += 1
+                RESOLVER_LOOKUPS.labels(result="joined").inc()
+                return future
+            self.misses += 1
+            RESOLVER_LOOKUPS.labels(result="miss").inc()
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="resolver")
+            future = self._inflight[key] = self._pool.submit(self._extract, key, page_url)
+        return future
+
+    def resolve(self, url, timeout=None):
+        """Media URL for `url`, waiting at most `timeout` (default Config.RESOLVER_TIMEOUT) seconds."""
+        return self.resolve_async(url).result(Config.RESOLVER_TIMEOUT if timeout is None else timeout)
+
+    def prefetch(self, url):
+        """Start resolving `url` in the background (no-op if cached or already running)."""
+        self.resolve_async(url)
+
+    def invalidate(self, url):
+        """Forget a cached URL, e.g. after it failed to open."""
+        with self._lock:
+            self._cache.pop(canonical(url)[0], None)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._cache), "inflight": len(self._inflight), "hits": self.hits,
+                    "misses": self.misses, "joined": self.joined}
+
+    def _extract(self, key, page_url):
+        start = time.perf_counter()
+        try:
+            media_url = self.extractor(page_url)
+        except Exception as e:
+            log.warning("Could not resolve stream URL: %s", e, extra={"url": page_url})
+            with self._lock:
+                self._inflight.pop(key, None)
+            raise
+        elapsed = time.perf_counter() - start
+        RESOLVE_LATENCY.observe(elapsed)
+        expires = url_expiry(media_url)
+        valid_until = (expires - self.margin) if expires else time.time() + self.ttl
+        with self._lock:
+            self._inflight.pop(key, None)
+            self._cache[key] = (media_url, valid_until)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        log.info("Resolved stream URL", extra={"key": key, "seconds": round(elapsed, 2),
+                                               "valid_s": round(valid_until - time.time())})
+        return media_url
@@ -2,13 +2,17 @@
 import os
 import tempfile
 import numpy as np
-import cv2
-from flask import Blueprint, request, jsonify, current_app, send_file
+from flask import Blueprint, request, jsonify
+from flask_socketio import emit
 from werkzeug.utils import secure_filename
-from app.models import predict_batch, get_model
+from app.models import get_inference, ModelNotReady
 from app.config import Config
-from app.detection.realtime import get_worker
+from app.detection.realtime import get_worker, release_worker
+from app.detection.sessions import AdmissionError
+from app.detection.sampling import sample_frames
+from app.detection.preprocess import pad_sequence
 from app.extensions import socketio
+from app.database import detection_log
 
 detection_bp = Blueprint("detection_bp", __name__)
 
@@ -20,54 +24,13 @@ def allowed_file(filename):
 
 def extract_fixed_frames_from_video(path, seq_len=30, target_size=(64,64)):
     """
-    Read video, extract frames (uniform sampling) -> resize -> normalize -> pad/truncate to seq_len
-    returns np.array shape (seq_len, H, W, 3) dtype float32 in [0,1]
+    Read video, extract frames (uniform sampling) -> resize -> RGB -> pad/truncate to seq_len
+    returns np.array shape (seq_len, H, W, 3) dtype uint8
     """
-    cap = cv2.VideoCapture(path)
-    frames = []
-    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) or 0
-
-    # If video cannot be opened or zero frames, return empty list
-    if not cap.isOpened() or total == 0:
-        cap.release()
+    frames = sample_frames(path, seq_len, target_size, strategy=Config.SAMPLER_STRATEGY)
+    if frames is None or len(frames) == 0:
         return None
-
-    # We will sample frames uniformly if total > seq_len, else read all and pad
-    if total <= seq_len:
-        # read all frames
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-            frame = cv2.resize(frame, target_size)
-            frames.append(frame)
-    else:
-        # pick indices
-        indices = np.linspace(0, total-1, seq_len, dtype=int)
-        cur = 0
-        idx_set = set(indices.tolist())
-        i = 0
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-            if i in idx_set:
-                frame = cv2.resize(frame, target_size)
-                frames.append(frame)
-            i += 1
-            if len(frames) >= seq_len:
-                break
-    cap.release()
-
-    if len(frames) == 0:
-        return None
-
-    # pad if needed
-    while len(frames) < seq_len:
-        frames.append(np.zeros_like(frames[-1], dtype=np.uint8))
-
-    arr = np.stack(frames, axis=0).astype("float32") / 255.0
-    return arr
+    return pad_sequence(frames, seq_len)
 
 @detection_bp.route("/analyze", methods=["POST"])
 def analyze_video():
@@ -82,6 +45,12 @@ def analyze_video():
     if not filename or not allowed_file(filename):
         return jsonify({"error": "Unsupported file type"}), 400
 
+    # fail fast while the model is still loading, before decoding anything
+    try:
+        inference = get_inference(timeout=Config.MODEL_READY_TIMEOUT)
+    except ModelNotReady as e:
+        return jsonify({"error": str(e)}), 503
+
     # save temporarily
     tmpdir = tempfile.mkdtemp()
     path = os.path.join(tmpdir, filename)
@@ -99,11 +68,14 @@ def analyze_video():
         return jsonify({"error": "Could not read frames from video"}), 400
 
     batch = np.expand_dims(seq, axis=0)  # (1, seq, H, W, 3)
-    preds = predict_batch(batch)
-    class_id = int(np.argmax(preds[0]))
-    confidence = float(np.max(preds[0]))
+    preds = inference.predict(batch)
+    # single sigmoid output: probability the clip is fake
+    prob = float(preds[0][0])
+    class_id = int(prob > 0.5)
+    confidence = prob if class_id else 1.0 - prob
 
     label = "real" if class_id == 0 else "fake"
+    detection_log.log("api", label.upper(), confidence, filename=filename, mode="sample")
     return jsonify({"label": label, "class_id": class_id, "confidence": confidence})
 
 # SocketIO events to start/stop real-time streaming from a client's webcam or server camera source
@@ -114,14 +86,21 @@ def handle_start_analysis(data):
     default source = 0 (server webcam)
     """
     src = data.get("source", 0) if data else 0
-    worker = get_worker()
+    try:
+        worker = get_worker(request.sid)
+    except AdmissionError as e:
+        emit("realtime_error", {"msg": str(e)})
+        return
     # allow overriding source
     worker.source = src
     worker.start()
-    socketio.emit("analysis_started", {"msg": "Real-time analysis started"})
+    emit("analysis_started", {"msg": "Real-time analysis started"})
 
 @socketio.on("stop_analysis")
 def handle_stop_analysis():
-    worker = get_worker()
-    worker.stop()
-    socketio.emit("analysis_stopped", {"msg": "Real-time analysis stopped"})
+    release_worker(request.sid)
+    emit("analysis_stopped", {"msg": "Real-time analysis stopped"})
+
+@socketio.on("disconnect")
+def handle_disconnect():
+    release_worker(request.sid)
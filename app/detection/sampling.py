@@ -0,0 +1,174 @@
+# app/detection/sampling.py
+import logging
+
+import cv2
+import numpy as np
+
+from app.config import Config
+from app.detection.faces import FaceCropper
+from app.detection.preprocess import INPUT_DTYPE, resize_into
+
+log = logging.getLogger(__name__)
+
+STRATEGIES = ("auto", "grab", "seek", "scan")
+
+# "was the last grabbed frame a keyframe" (OpenCV >= 4.6, FFmpeg backend)
+_HAS_KEY_FRAME = getattr(cv2, "CAP_PROP_LRF_HAS_KEY_FRAME", None)
+
+
+def sample_indices(frame_count, seq_len):
+    """Uniformly spaced, distinct frame indices over the whole clip."""
+    return np.unique(np.linspace(0, frame_count - 1, seq_len, dtype=int))
+
+
+def _store(frame, out, i, size, bgr_to_rgb, cropper=None):
+    if cropper is not None:
+        frame = cropper.crop(frame)
+    resize_into(frame, out[i], size, bgr_to_rgb)
+
+
+def _sample_grab(cap, indices, out, size, bgr_to_rgb, seek_gap=None, cropper=None):
+    """
+    Single forward pass: grab() every frame (demux + decode, no colour
+    conversion or copy) and retrieve() only the sampled ones.
+
+    With `seek_gap` set, keyframes are tracked while grabbing to measure the
+    GOP length; a gap to the next sampled frame longer than that is jumped
+    with a seek, which only decodes from the keyframe before the target.
+    `seek_gap` is the assumed GOP until one has been observed.
+    """
+    track_keys = seek_gap is not None and _HAS_KEY_FRAME is not None
+    gop = None
+    last_key = None
+    pos = 0
+    filled = 0
+    for idx in indices:
+        if seek_gap is not None and idx - pos > (gop or seek_gap):
+            cap.set(cv2.CAP_PROP_POS_FRAMES, int(idx))
+            landed = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+            last_key = None
+            if landed == idx:
+                pos = idx
+            elif 0 <= landed < idx:
+                # inexact seek: walk forward from wherever we landed
+                pos = landed
+            else:
+                # overshot: container seeking is unreliable, go back to linear
+                cap.set(cv2.CAP_PROP_POS_FRAMES, pos)
+                seek_gap = None
+                track_keys = False
+        while pos < idx:
+            if not cap.grab():
+                return filled
+            if track_keys and cap.get(_HAS_KEY_FRAME):
+                if last_key is not None:
+                    gop = pos - last_key
+                last_key = pos
+            pos += 1
+        ok, frame = cap.read()
+        if not ok:
+            return filled
+        pos += 1
+        _store(frame, out, filled, size, bgr_to_rgb, cropper)
+        filled += 1
+    return filled
+
+
+def _sample_scan(cap, seq_len, size, bgr_to_rgb, cropper=None):
+    """
+    For containers whose frame count can't be trusted: decode the whole clip
+    keeping every `stride`-th frame, halving the kept set (and doubling the
+    stride) whenever it reaches 2 * seq_len, then pick seq_len uniformly.
+    Memory stays at 2 * seq_len small frames however long the clip is.
+    """
+    width, height = size
+    kept = np.empty((2 * seq_len, height, width, 3), dtype=INPUT_DTYPE)
+    n_kept = 0
+    stride = 1
+    i = 0
+    while True:
+        if i % stride:
+            if not cap.grab():
+                break
+            i += 1
+            continue
+        ok, frame = cap.read()
+        if not ok:
+            break
+        i += 1
+        _store(frame, kept, n_kept, size, bgr_to_rgb, cropper)
+        n_kept += 1
+        if n_kept == len(kept):
+            kept[:seq_len] = kept[0::2]
+            n_kept = seq_len
+            stride *= 2
+    if n_kept == 0:
+        return None
+    if n_kept <= seq_len:
+        return kept[:n_kept].copy()
+    return kept[sample_indices(n_kept, seq_len)]
+
+
+def sample_frames(video_path, seq_len=30, size=(64, 64), strategy="auto", bgr_to_rgb=True, seek_gap=None,
+                  face_crop=None):
+    """
+    Uniformly sample `seq_len` frames from a video file, resized to `size`.
+
+    Strategies:
+      - "grab": one forward pass, decoding but only retrieving sampled frames
+      - "seek": like grab, but gaps longer than one GOP (measured from the
+                keyframes seen, else `seek_gap`) are jumped with a seek
+      - "scan": decode everything with a bounded reservoir, for files whose
+                CAP_PROP_FRAME_COUNT is missing or wrong
+      - "auto": pick from the reported frame count, falling back to "scan"
+                if the count turns out to be wrong
+
+    With `face_crop` (default Config.FACE_CROP) every sampled frame is
+    cropped to its largest face first; sampled frames are far apart, so the
+    detector runs on each of them rather than tracking.
+
+    Returns a uint8 array (n, H, W, 3) with n <= seq_len, or None if nothing
+    could be read.
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown sampling strategy: {strategy}")
+    seek_gap = Config.SAMPLER_SEEK_GAP if seek_gap is None else seek_gap
+    cropper = FaceCropper.from_config(detect_every=1, enabled=face_crop)
+
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        log.warning("Could not open video", extra={"path": video_path})
+        return None
+    try:
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        if strategy == "auto":
+            if frame_count <= 0:
+                strategy = "scan"
+            elif _HAS_KEY_FRAME is not None or frame_count / seq_len > seek_gap:
+                # seeking is decided per gap, so it never does worse than grab
+                strategy = "seek"
+            else:
+                strategy = "grab"
+
+        if strategy == "scan" or frame_count <= 0:
+            return _sample_scan(cap, seq_len, size, bgr_to_rgb, cropper)
+
+        width, height = size
+        indices = sample_indices(frame_count, seq_len)
+        out = np.empty((len(indices), height, width, 3), dtype=INPUT_DTYPE)
+        filled = _sample_grab(cap, indices, out, size, bgr_to_rgb,
+                              seek_gap if strategy == "seek" else None, cropper)
+        if filled == len(indices):
+            return out
+    finally:
+        cap.release()
+
+    # the reported frame count was too high: redo it with a full scan
+    log.info("Frame count unreliable, rescanning", extra={"path": video_path, "frame_count": frame_count})
+    cap = cv2.VideoCapture(video_path)
+    if cropper is not None:
+        cropper.reset()
+    try:
+        return _sample_scan(cap, seq_len, size, bgr_to_rgb, cropper)
+    finally:
+        cap.release()
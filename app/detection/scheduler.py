@@ -0,0 +1,77 @@
+# app/detection/scheduler.py
+import time
+import threading
+
+from app.config import Config
+
+
+class InferenceScheduler:
+    """
+    Decides which captured frames trigger a model prediction.
+
+    Modes:
+      - "stride":   every `every_n`-th frame
+      - "adaptive": whenever the previous prediction has finished
+      - "rate":     at most `target_pps` predictions per second
+    Only one prediction is ever in flight; frames in between reuse the last
+    label.
+    """
+
+    MODES = ("stride", "adaptive", "rate")
+
+    def __init__(self, mode="adaptive", every_n=5, target_pps=2.0):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown inference mode: {mode}")
+        self.mode = mode
+        self.every_n = max(1, int(every_n))
+        self.min_interval = 1.0 / target_pps if target_pps > 0 else 0.0
+        self.inference_fps = 0.0
+        self._busy = threading.Event()
+        self._rate_lock = threading.Lock()
+        self._frames_since = 0
+        self._last_start = 0.0
+        self._done = 0
+        self._rate_start = time.time()
+
+    @classmethod
+    def from_config(cls):
+        return cls(Config.INFERENCE_MODE, Config.INFERENCE_EVERY_N, Config.INFERENCE_TARGET_PPS)
+
+    @property
+    def busy(self):
+        return self._busy.is_set()
+
+    def should_run(self, now=None):
+        """Call once per captured frame; True means start a prediction now."""
+        now = time.time() if now is None else now
+        self._frames_since += 1
+        if self._busy.is_set():
+            return False
+        if self.mode == "stride":
+            return self._frames_since >= self.every_n
+        if self.mode == "rate":
+            return now - self._last_start >= self.min_interval
+        return True
+
+    def started(self, now=None):
+        self._busy.set()
+        self._frames_since = 0
+        self._last_start = time.time() if now is None else now
+
+    def finished(self, now=None):
+        now = time.time() if now is None else now
+        with self._rate_lock:
+            self._done += 1
+        self._busy.clear()
+        self.update_rate(now)
+
+    def update_rate(self, now=None):
+        """Refresh `inference_fps` (completed predictions/s) about once a second."""
+        now = time.time() if now is None else now
+        with self._rate_lock:
+            elapsed = now - self._rate_start
+            if elapsed >= 1.0:
+                self.inference_fps = self._done / elapsed
+                self._done = 0
+                self._rate_start = now
+        return self.inference_fps
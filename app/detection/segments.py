@@ -0,0 +1,154 @@
+# app/detection/segments.py
+import time
+import logging
+
+import cv2
+import numpy as np
+
+from app.config import Config
+from app.detection.faces import FaceCropper
+from app.detection.window import FrameWindow
+from app.detection.preprocess import INPUT_DTYPE
+
+log = logging.getLogger(__name__)
+
+
+class SegmentScorer:
+    """
+    Dense scoring of a whole clip: one streaming decode pass, overlapping
+    windows of `seq_len` frames every `stride` frames, scored `batch_size`
+    windows per model call.
+
+    `frame_step` keeps every n-th decoded frame (the rest are only grabbed),
+    so a window spans seq_len * frame_step source frames.
+
+    The clip is FAKE when any window scores above `threshold`, with the
+    highest window probability as its confidence. With `early_exit` set,
+    decoding stops once that many windows scored above `threshold`; this
+    only shortens the timeline, never changes the verdict. The check runs
+    after each model call, so up to `batch_size` - 1 windows past the
+    trigger may still be decoded and scored.
+
+    With `face_crop` each kept frame is cropped to the tracked face first,
+    like the other upload paths (the detector runs every
+    Config.FACE_DETECT_EVERY kept frames, since they are consecutive).
+    """
+
+    def __init__(self, predict_fn, seq_len=30, size=(64, 64), stride=15, frame_step=1,
+                 batch_size=8, threshold=0.5, early_exit=0, face_crop=False):
+        self.predict_fn = predict_fn  # (N, seq_len, H, W, 3) uint8 -> (N, 1) fake probabilities
+        self.seq_len = seq_len
+        self.size = size
+        self.stride = max(1, stride)
+        self.frame_step = max(1, frame_step)
+        self.batch_size = max(1, batch_size)
+        self.threshold = threshold
+        self.early_exit = early_exit
+        self.face_crop = face_crop
+
+    @classmethod
+    def from_config(cls, predict_fn, early_exit=None):
+        return cls(predict_fn, Config.SEQUENCE_LENGTH, (Config.IMG_WIDTH, Config.IMG_HEIGHT),
+                   Config.SEGMENT_STRIDE, Config.SEGMENT_FRAME_STEP, Config.SEGMENT_BATCH,
+                   early_exit=Config.SEGMENT_EARLY_EXIT if early_exit is None else early_exit,
+                   face_crop=Config.FACE_CROP)
+
+    def params(self):
+        """Cache/report key for the settings that change the result."""
+        params = (f"segments;seq={self.seq_len};size={self.size[0]}x{self.size[1]};stride={self.stride};"
+                  f"step={self.frame_step};exit={self.early_exit}")
+        if self.face_crop:
+            params += f";face={Config.FACE_MARGIN}"
+        return params
+
+    def score(self, video_path, bgr_to_rgb=True, cancelled=None):
+        """
+        Returns {"result", "confidence", "segments": [...], "summary": {...}}
+        or None if the clip is shorter than one window. `cancelled()` is
+        polled between batches.
+        """
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            log.warning("Could not open video", extra={"path": video_path})
+            return None
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        width, height = self.size
+        window = FrameWindow(self.seq_len, self.size)
+        cropper = FaceCropper.from_config(enabled=self.face_crop)
+        batch = np.empty((self.batch_size, self.seq_len, height, width, 3), dtype=INPUT_DTYPE)
+        starts = []  # source frame index of each window in `batch`
+        kept_at = np.zeros(self.seq_len, dtype=np.int64)  # source index per kept frame (ring)
+        segments = []
+        raw = []  # unrounded fake probability per window; the verdict comes from these
+        fakes = 0
+        frame_idx = -1
+        kept = 0
+        stopped_early = False
+        start = time.perf_counter()
+
+        def flush():
+            nonlocal fakes
+            if not starts:
+                return
+            probs = np.asarray(self.predict_fn(batch[:len(starts)]))[:, 0]
+            for first, prob in zip(starts, probs):
+                first = int(first)
+                last = first + (self.seq_len - 1) * self.frame_step
+                segments.append({"start_frame": first, "end_frame": last,
+                                 "start_s": round(first / fps, 2), "end_s": round(last / fps, 2),
+                                 "fake_prob": round(float(prob), 4)})
+                raw.append(float(prob))
+                fakes += int(prob > self.threshold)
+            starts.clear()
+
+        try:
+            while True:
+                frame_idx += 1
+                if frame_idx % self.frame_step:
+                    if not cap.grab():
+                        break
+                    continue
+                ok, frame = cap.read()
+                if not ok:
+                    break
+                window.push(cropper.crop(frame) if cropper is not None else frame, bgr_to_rgb=bgr_to_rgb)
+                kept_at[kept % self.seq_len] = frame_idx
+                kept += 1
+                if not window.is_full or (kept - self.seq_len) % self.stride:
+                    continue
+                np.copyto(batch[len(starts)], window.view())
+                starts.append(kept_at[kept % self.seq_len])  # oldest frame in the window
+                if len(starts) == self.batch_size:
+                    flush()
+                    if self.early_exit and fakes >= self.early_exit:
+                        stopped_early = True
+                        break
+                    if cancelled is not None and cancelled():
+                        return None
+            if not stopped_early:
+                flush()
+        finally:
+            cap.release()
+
+        decoded = frame_idx + 1 if stopped_early else frame_idx
+        if not segments:
+            return None
+        probs = np.array(raw)
+        fake = bool(probs.max() > self.threshold)
+        top = probs.max() if fake else 1.0 - probs.max()
+        return {
+            "result": "FAKE" if fake else "REAL",
+            "confidence": round(float(top), 2),
+            "segments": segments,
+            "summary": {
+                "windows": len(segments),
+                "fake_windows": fakes,
+                "fake_fraction": round(fakes / len(segments), 3),
+                "mean_fake_prob": round(float(probs.mean()), 4),
+                "max_fake_prob": round(float(probs.max()), 4),
+                "frames_decoded": decoded,
+                "duration_s": round(decoded / fps, 2),
+                "stopped_early": stopped_early,
+                "elapsed_s": round(time.perf_counter() - start, 2),
+            },
+        }
@@ -0,0 +1,143 @@
+# app/detection/sessions.py
+import time
+import uuid
+import logging
+import threading
+
+from app.config import Config
+
+log = logging.getLogger(__name__)
+
+
+class AdmissionError(Exception):
+    """Raised when a new stream would exceed the node or per-user limits."""
+
+
+class StreamSession:
+    """One live stream: its owner, pipeline and last activity time."""
+
+    def __init__(self, stream_id, owner):
+        self.stream_id = stream_id
+        self.owner = owner
+        self.pipeline = None
+        self.profile = Config.OUTPUT_PROFILE  # default output profile for viewers
+        self.created = time.time()
+        self.last_seen = self.created
+
+    def touch(self):
+        self.last_seen = time.time()
+
+    @property
+    def running(self):
+        return self.pipeline is not None and self.pipeline.running
+
+    def close(self):
+        if self.pipeline is not None:
+            self.pipeline.stop()  # joins the stages and releases the capture
+
+
+class StreamRegistry:
+    """
+    Live streams keyed by stream id, with admission limits and idle reaping.
+
+    `open` only reserves a slot; the caller attaches the pipeline once the
+    source is opened, and calls `close` if that fails.
+    """
+
+    def __init__(self, max_streams=4, max_per_user=1, idle_timeout=60.0, viewer_grace=10.0, reap_interval=5.0):
+        self.max_streams = max_streams
+        self.max_per_user = max_per_user
+        self.idle_timeout = idle_timeout
+        self.viewer_grace = viewer_grace
+        self.reap_interval = reap_interval
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._reaper = None
+
+    @classmethod
+    def from_config(cls):
+        return cls(Config.MAX_STREAMS, Config.MAX_STREAMS_PER_USER, Config.STREAM_IDLE_TIMEOUT,
+                   Config.STREAM_VIEWER_GRACE)
+
+    @staticmethod
+    def new_id():
+        return uuid.uuid4().hex
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def sessions(self):
+        return list(self._sessions.values())
+
+    def open(self, stream_id, owner):
+        """Reserve `stream_id` for `owner`, replacing that id's previous stream."""
+        self.close(stream_id)
+        with self._lock:
+            if len(self._sessions) >= self.max_streams:
+                raise AdmissionError(f"Server is at its limit of {self.max_streams} live streams")
+            owned = sum(1 for s in self._sessions.values() if s.owner == owner)
+            if owned >= self.max_per_user:
+                raise AdmissionError(f"You already have {owned} live stream(s) running")
+            stream = StreamSession(stream_id, owner)
+            self._sessions[stream_id] = stream
+        self._ensure_reaper()
+        return stream
+
+    def get(self, stream_id, owner=None):
+        stream = self._sessions.get(stream_id)
+        if stream is None or (owner is not None and stream.owner != owner):
+            return None
+        stream.touch()
+        return stream
+
+    def close(self, stream_id):
+        with self._lock:
+            stream = self._sessions.pop(stream_id, None)
+        if stream is not None:
+            stream.close()
+            log.info("Stream closed", extra={"stream_id": stream_id[:8]})
+        return stream is not None
+
+    def close_all(self):
+        for stream_id in list(self._sessions):
+            self.close(stream_id)
+
+    def is_idle(self, stream, now):
+        """
+        A stream with viewers is never idle. Once its last viewer left it
+        gets `viewer_grace` seconds (enough for a page reload); one that was
+        never watched gets `idle_timeout` since it was last touched.
+        """
+        if stream.pipeline is None:
+            return False
+        broadcaster = stream.pipeline.broadcaster
+        if broadcaster.subscribers:
+            return False
+        if broadcaster.sent:
+            return now - max(broadcaster.idle_since, stream.last_seen) > self.viewer_grace
+        return now - stream.last_seen > self.idle_timeout
+
+    def reap_idle(self, now=None):
+        """Close streams that nobody is watching or polling any more."""
+        now = time.time() if now is None else now
+        with self._lock:
+            idle = [sid for sid, s in self._sessions.items() if self.is_idle(s, now)]
+        for stream_id in idle:
+            log.info("Reaping idle stream", extra={"stream_id": stream_id[:8]})
+            self.close(stream_id)
+        return len(idle)
+
+    def _ensure_reaper(self):
+        with self._lock:
+            if self._reaper is not None and self._reaper.is_alive():
+                return
+            self._reaper = threading.Thread(target=self._reap_loop, name="stream-reaper", daemon=True)
+            self._reaper.start()
+
+    def _reap_loop(self):
+        while True:
+            time.sleep(self.reap_interval)
+            try:
+                self.reap_idle()
+            except Exception:
+                log.exception("Reaper error")
@@ -0,0 +1,57 @@
+# app/detection/window.py
+import numpy as np
+
+from app.detection.preprocess import INPUT_DTYPE, resize_into
+
+
+class FrameWindow:
+    """
+    Fixed-size sliding window of resized frames for a single stream.
+
+    Frames are kept as uint8 in one preallocated ring. Every frame is written
+    twice (slot i and slot i + seq_len) so the last seq_len frames are always
+    one contiguous slice, in arrival order, without copying.
+    """
+
+    def __init__(self, seq_len=30, size=(64, 64), channels=3):
+        width, height = size
+        self.seq_len = seq_len
+        self.size = (width, height)
+        self._ring = np.zeros((2 * seq_len, height, width, channels), dtype=INPUT_DTYPE)
+        self._input = np.zeros((1, seq_len, height, width, channels), dtype=INPUT_DTYPE)
+        self._cursor = 0  # slot the next frame goes into
+        self._count = 0
+        self.pushed = 0  # frames pushed since creation / clear()
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def is_full(self):
+        return self._count >= self.seq_len
+
+    def push(self, frame, bgr_to_rgb=False):
+        """Resize `frame` straight into the ring and advance the cursor."""
+        slot = resize_into(frame, self._ring[self._cursor], self.size, bgr_to_rgb)
+        self._ring[self._cursor + self.seq_len] = slot
+
+        self._cursor = (self._cursor + 1) % self.seq_len
+        self._count = min(self._count + 1, self.seq_len)
+        self.pushed += 1
+
+    def view(self):
+        """Zero-copy (seq_len, H, W, 3) uint8 view, oldest frame first."""
+        return self._ring[self._cursor:self._cursor + self.seq_len]
+
+    def as_batch(self):
+        """
+        Copy the window into the reused (1, seq_len, H, W, 3) uint8 model
+        input. The returned array is overwritten by the next call.
+        """
+        np.copyto(self._input[0], self.view())
+        return self._input
+
+    def clear(self):
+        self._cursor = 0
+        self._count = 0
+        self.pushed = 0
@@ -0,0 +1,4 @@
+# app/extensions.py
+from flask_socketio import SocketIO
+
+socketio = SocketIO()
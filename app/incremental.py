@@ -0,0 +1,139 @@
+# app/incremental.py
+import logging
+import threading
+
+import numpy as np
+
+from app.detection.preprocess import INPUT_DTYPE, normalize
+
+log = logging.getLogger(__name__)
+
+
+class SplitPredictor:
+    """
+    The CNN-LSTM cut at its TimeDistributed boundary: `embed` runs the
+    per-frame CNN on frames, `head` runs the LSTM/dense layers on a
+    sequence of embeddings. Both halves share the loaded model's weights
+    and are traced ahead of time through CompiledPredictor.
+    """
+
+    def __init__(self, frame_model, head_model, seq_len, embed_batch_sizes=(1, 2, 4, 8, 16, 32)):
+        from app.predictor import CompiledPredictor
+
+        self.seq_len = seq_len
+        self.embedding_shape = tuple(frame_model.output_shape[1:])
+        self._embed = CompiledPredictor(frame_model, batch_sizes=embed_batch_sizes)
+        self._head = CompiledPredictor(head_model, batch_sizes=(1,), frames=False)
+
+    @classmethod
+    def from_model(cls, model, atol=1e-4, seed=0):
+        """
+        Split `model`, or return None if it isn't a plain stack of leading
+        TimeDistributed layers followed by a sequence head, or if the split
+        halves don't reproduce the full model within `atol`.
+        """
+        try:
+            frame_model, head_model = _split(model)
+        except Exception as e:
+            log.info("Model can't be split for incremental inference: %s", e)
+            return None
+
+        seq_len = model.input_shape[1]
+        rng = np.random.default_rng(seed)
+        probe = normalize(rng.integers(0, 256, (2,) + tuple(model.input_shape[1:]), dtype=INPUT_DTYPE))
+        try:
+            full = np.asarray(model(probe, training=False))
+            frames = probe.reshape((-1,) + probe.shape[2:])
+            embeddings = np.asarray(frame_model(frames, training=False))
+            split = np.asarray(head_model(embeddings.reshape((2, seq_len) + embeddings.shape[1:]), training=False))
+        except Exception as e:
+            log.info("Split model failed its parity check: %s", e)
+            return None
+        error = float(np.abs(full - split).max())
+        if error > atol:
+            log.warning("Split model differs from the full model (max error %.2g), not using it", error)
+            return None
+        log.info("Incremental inference enabled", extra={"max_error": error})
+        return cls(frame_model, head_model, seq_len)
+
+    def embed(self, frames):
+        """(n, H, W, 3) uint8 -> (n, *embedding_shape)."""
+        return self._embed.predict(frames)
+
+    def head(self, embeddings):
+        """(seq_len, *embedding_shape) -> fake probability."""
+        return float(self._head.predict(embeddings[np.newaxis])[0][0])
+
+
+def _split(model):
+    from tensorflow import keras
+
+    layers = [layer for layer in model.layers if not isinstance(layer, keras.layers.InputLayer)]
+    n_td = 0
+    while n_td < len(layers) and isinstance(layers[n_td], keras.layers.TimeDistributed):
+        n_td += 1
+    if n_td == 0 or n_td == len(layers):
+        raise ValueError("no TimeDistributed prefix followed by a sequence head")
+    if len(model.inputs) != 1 or len(model.outputs) != 1:
+        raise ValueError("only single-input, single-output models are supported")
+
+    frame_input = keras.Input(tuple(model.input_shape[2:]))
+    x = frame_input
+    for layer in layers[:n_td]:
+        x = layer.layer(x)
+    frame_model = keras.Model(frame_input, x, name="frame_features")
+
+    head_input = keras.Input((model.input_shape[1],) + tuple(x.shape[1:]))
+    h = head_input
+    for layer in layers[n_td:]:
+        h = layer(h)
+    head_model = keras.Model(head_input, h, name="sequence_head")
+    # layers were walked in list order; the parity check in from_model
+    # catches functional graphs where that isn't the real data flow
+    return frame_model, head_model
+
+
+class IncrementalScorer:
+    """
+    Per-stream ring of the last `seq_len` frame embeddings.
+
+    `predict(batch, pushed)` gets the usual (1, seq_len, H, W, 3) window
+    plus the window's running frame count; only frames pushed since the
+    previous call go through the CNN, then the head scores the cached
+    sequence. Returns None when no split model is available, so callers
+    can fall back to the full model.
+    """
+
+    def __init__(self, get_split):
+        self.get_split = get_split  # -> SplitPredictor or None (e.g. still loading)
+        self.embedded = 0  # frames embedded so far
+        self.active = False  # last prediction went through the split model
+        self._ring = None
+        self._cursor = 0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def predict(self, batch, pushed):
+        split = self.get_split()
+        self.active = split is not None
+        if split is None:
+            return None
+        seq_len = split.seq_len
+        with self._lock:
+            if self._ring is None:
+                self._ring = np.zeros((2 * seq_len,) + split.embedding_shape, dtype=np.float32)
+            new = pushed - self.embedded
+            if new < 0 or self._count < seq_len:
+                new = seq_len  # first call, or the window was cleared: embed all of it
+            new = min(new, seq_len)
+            if new:
+                self._push(split.embed(batch[0, seq_len - new:]), seq_len)
+            self.embedded = pushed
+            return split.head(self._ring[self._cursor:self._cursor + seq_len])
+
+    def _push(self, embeddings, seq_len):
+        for embedding in embeddings:
+            self._ring[self._cursor] = embedding
+            self._ring[self._cursor + seq_len] = embedding
+            self._cursor = (self._cursor + 1) % seq_len
+            self._count = min(self._count + 1, seq_len)
@@ -0,0 +1,232 @@
+# app/metrics.py
+"""
+Process-wide metrics in the Prometheus text exposition format, served at
+/metrics.
+
+Kept dependency-free: counters, gauges and histograms are a few integers
+and floats behind a lock, cheap enough for the per-frame loops. Hot paths
+look up their labelled child once (`HIST.labels(stage="capture")`) and
+only call `observe`/`inc` per frame. Gauges that describe current state
+(active streams, queue depths, ...) are read at scrape time through
+`set_function` instead of being updated as things change.
+"""
+import bisect
+import math
+import threading
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+SLOW_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _number(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labelnames=(), registry=None):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        (REGISTRY if registry is None else registry).append(self)
+        if not self.labelnames:
+            self.labels()  # so unlabelled metrics are exported as 0 from the start
+
+    def labels(self, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _default(self):
+        # unlabelled metrics act as their own single child
+        return self.labels()
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for key, child in sorted(self._children.items()):
+            lines.extend(self._render_child(key, child))
+        return lines
+
+
+class _CounterChild:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1.0):
+        with self._lock:
+            self.value += amount
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1.0):
+        self._default().inc(amount)
+
+    def _render_child(self, key, child):
+        return [f"{self.name}{_labels(self.labelnames, key)} {_number(child.value)}"]
+
+
+class _GaugeChild:
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value):
+        self.value = value
+
+
+class Gauge(_Metric):
+    """
+    A gauge. `set_function(fn)` makes it computed at scrape time: fn returns
+    a number, or for labelled gauges a {label value(s): number} dict.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name, help, labelnames=(), registry=None):
+        super().__init__(name, help, labelnames, registry)
+        self._fn = None
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value):
+        self._default().set(value)
+
+    def set_function(self, fn):
+        self._fn = fn
+
+    def render(self):
+        if self._fn is None:
+            return super().render()
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        try:
+            values = self._fn()
+        except Exception:
+            return lines
+        if not isinstance(values, dict):
+            values = {(): values}
+        for key, value in sorted(values.items()):
+            key = key if isinstance(key, tuple) else (key,)
+            lines.append(f"{self.name}{_labels(self.labelnames, key)} {_number(value)}")
+        return lines
+
+    def _render_child(self, key, child):
+        return [f"{self.name}{_labels(self.labelnames, key)} {_number(child.value)}"]
+
+
+class _HistogramChild:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last one is +Inf
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS, registry=None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self._default().observe(value)
+
+    def _render_child(self, key, child):
+        with child._lock:
+            counts, total = list(child.counts), child.sum
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), counts):
+            cumulative += count
+            le = _labels(self.labelnames, key, [("le", _number(float(bound)) if bound != math.inf else "+Inf")])
+            lines.append(f"{self.name}_bucket{le} {cumulative}")
+        plain = _labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{plain} {_number(total)}")
+        lines.append(f"{self.name}_count{plain} {cumulative}")
+        return lines
+
+
+REGISTRY = []
+
+
+def render(registry=None):
+    lines = []
+    for metric in REGISTRY if registry is None else registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ---------- live streams ----------
+STAGE_LATENCY = Histogram("deepfake_stage_latency_seconds",
+                          "Per-frame latency of each live pipeline stage.", ["stage"])
+FRAMES_DROPPED = Counter("deepfake_frames_dropped_total",
+                         "Frames evicted from a full pipeline queue.", ["queue"])
+VIEWER_FRAMES_SKIPPED = Counter("deepfake_viewer_frames_skipped_total",
+                                "Frames a slow MJPEG viewer never received.")
+INFERENCE_SKIPPED = Counter("deepfake_inference_skipped_total",
+                            "Scheduled live predictions skipped because the window barely changed.")
+ACTIVE_STREAMS = Gauge("deepfake_active_streams", "Live streams currently open.")
+VIEWERS = Gauge("deepfake_viewers", "MJPEG viewers currently connected.")
+QUEUE_DEPTH = Gauge("deepfake_queue_depth", "Items waiting in pipeline and model queues.", ["queue"])
+VERDICT_LATENCY = Histogram("deepfake_verdict_latency_seconds",
+                            "Time from a frame being captured to the verdict that includes it.",
+                            buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0))
+SOURCE_RECONNECTS = Counter("deepfake_source_reconnects_total",
+                            "Reconnect attempts to stalled live sources.", ["result"])
+
+RESOLVER_LOOKUPS = Counter("deepfake_resolver_lookups_total",
+                           "Stream URL resolutions: cache hit, miss, or joined an in-flight one.", ["result"])
+RESOLVE_LATENCY = Histogram("deepfake_resolve_seconds", "Time to extract one stream URL.",
+                            buckets=SLOW_BUCKETS)
+
+# ---------- model ----------
+MODEL_BATCH_SIZE = Histogram("deepfake_model_batch_size", "Sequences per batched model call.",
+                             buckets=(1, 2, 4, 8, 16, 32, 64))
+MODEL_CALL_LATENCY = Histogram("deepfake_model_call_seconds", "Latency of one batched model call.")
+MODEL_QUEUE_WAIT = Histogram("deepfake_model_queue_wait_seconds",
+                             "Time a sequence waited for the batcher.")
+MODEL_READY = Gauge("deepfake_model_ready", "1 once the model is loaded and warmed up.")
+
+# ---------- uploads ----------
+UPLOAD_DECODE = Histogram("deepfake_upload_decode_seconds", "Decode + sampling time per upload.",
+                          buckets=SLOW_BUCKETS)
+UPLOAD_LATENCY = Histogram("deepfake_upload_seconds", "Upload analysis time from request to result.",
+                           ["mode"], buckets=SLOW_BUCKETS)
+JOBS_FINISHED = Counter("deepfake_jobs_finished_total", "Upload jobs by final state.", ["state"])
+DETECTION_LOG_ROWS = Counter("deepfake_detection_log_rows_total",
+                             "Detection log rows written or dropped.", ["result"])
+RESULT_CACHE = Counter("deepfake_result_cache_lookups_total", "Upload result cache lookups.", ["result"])
@@ -0,0 +1,157 @@
+# app/models.py
+import time
+import logging
+import threading
+
+from app.config import Config
+
+log = logging.getLogger(__name__)
+
+
+class ModelNotReady(Exception):
+    """Raised when the model is still loading (or failed to load)."""
+
+
+class ModelRegistry:
+    """
+    The single model instance shared by every blueprint and worker.
+
+    Nothing touches TensorFlow until the model is first needed, either by
+    `start_background_load()` at app start or lazily by the first `get()`.
+    The loaded Keras model is wrapped in a CompiledPredictor and a
+    BatchingInferenceServer, so all callers share one copy of the weights.
+    With Config.INCREMENTAL_INFERENCE it is also split into a per-frame CNN
+    and a sequence head for live streams (see app/incremental.py). With a
+    TFLite Config.INFERENCE_BACKEND that passes its parity check, the
+    converted interpreter replaces the CompiledPredictor (app/quantized.py).
+    """
+
+    def __init__(self, path=None):
+        self.path = path or Config.MODEL_PATH
+        self.state = "idle"  # idle -> loading -> ready | failed
+        self.error = None
+        self.load_s = None
+        self.predictor = None
+        self.inference = None
+        self.split = None
+        self.backend = "keras"
+        self.parity = None
+        self._version = None
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+
+    def configure(self, path):
+        with self._lock:
+            if self.state != "idle":
+                raise RuntimeError("Model path can't change after loading started")
+            self.path = path
+
+    @property
+    def version(self):
+        """
+        Short content hash of the loaded model file (plus backend); keys
+        cached upload results. None until the model is ready, so nothing is
+        cached against a model that isn't there.
+        """
+        if self._version is None:
+            return None
+        return self._version if self.backend == "keras" else f"{self._version}-{self.backend}"
+
+    def start_background_load(self):
+        with self._lock:
+            if self.state != "idle":
+                return
+            self.state = "loading"
+        threading.Thread(target=self._load, name="model-loader", daemon=True).start()
+
+    def get(self, timeout=None):
+        """Loaded CompiledPredictor; loads inline if nobody started loading yet."""
+        load_here = False
+        with self._lock:
+            if self.state == "idle":
+                self.state = "loading"
+                load_here = True
+        if load_here:
+            self._load()
+        if not self._ready.wait(timeout):
+            raise ModelNotReady("Model is still loading")
+        if self.state != "ready":
+            raise ModelNotReady(f"Model failed to load: {self.error}")
+        return self.predictor
+
+    def get_inference(self, timeout=None):
+        self.get(timeout)
+        return self.inference
+
+    def get_split(self):
+        """SplitPredictor once the model is ready, None if loading or unsplittable; never blocks."""
+        return self.split if self.state == "ready" else None
+
+    def status(self):
+        data = {"state": self.state, "path": self.path, "version": self.version, "backend": self.backend}
+        if self.load_s is not None:
+            data["load_s"] = round(self.load_s, 2)
+        if self.predictor is not None:
+            data["input_shape"] = list(self.predictor.input_shape)
+            data["incremental"] = self.split is not None
+        if self.parity is not None:
+            data["parity"] = self.parity
+        if self.error:
+            data["error"] = self.error
+        return data
+
+    def _load(self):
+        # heavy imports live here so importing the app never pulls in TensorFlow
+        from app.utils import load_model
+        from app.predictor import CompiledPredictor
+        from app.detection.batching import BatchingInferenceServer
+        from app.incremental import SplitPredictor
+        from app.quantized import build_backend
+        from app.detection.cache import file_digest
+
+        start = time.perf_counter()
+        try:
+            model = load_model(self.path)
+            if model is None:
+                raise RuntimeError(f"could not load {self.path}")
+            self.predictor = CompiledPredictor(model, batch_sizes=Config.PREDICTOR_BATCH_SIZES)
+            if Config.INFERENCE_BACKEND != "keras":
+                optimized, self.parity = build_backend(model, self.predictor)
+                if optimized is not None:
+                    self.predictor = optimized
+                    self.backend = Config.INFERENCE_BACKEND
+            self.inference = BatchingInferenceServer(
+                self.predictor, Config.INFERENCE_MAX_BATCH, Config.INFERENCE_MAX_WAIT_MS, Config.INFERENCE_TIMEOUT)
+            if Config.INCREMENTAL_INFERENCE:
+                self.split = SplitPredictor.from_model(model)
+            # hashed here, once, rather than on the first request that asks
+            version = file_digest(self.path)[:16]
+            self.load_s = time.perf_counter() - start
+            self._version = version
+            self.state = "ready"
+            log.info("Model ready", extra={"load_s": round(self.load_s, 2),
+                                           "input_shape": self.predictor.input_shape})
+        except Exception as e:
+            self.error = str(e)
+            self.state = "failed"
+            log.error("Model failed to load: %s", e)
+        finally:
+            self._ready.set()
+
+
+registry = ModelRegistry()
+
+
+def get_model(timeout=None):
+    """Shared compiled predictor (Keras-style `.predict`)."""
+    return registry.get(timeout)
+
+
+def get_inference(timeout=None):
+    """Shared batching server; use this for anything called per request or per stream."""
+    return registry.get_inference(timeout)
+
+
+def predict_batch(batch):
+    """(N, seq_len, H, W, 3) -> (N, 1) fake probabilities via the shared batcher."""
+    return get_inference().predict(batch)
@@ -0,0 +1,181 @@
+# app/quantized.py
+import os
+import time
+import logging
+import threading
+
+import numpy as np
+
+from app.config import Config
+from app.detection.preprocess import INPUT_DTYPE, to_uint8
+
+log = logging.getLogger(__name__)
+
+BACKENDS = ("keras", "tflite-fp16", "tflite-int8")
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv", ".webm")
+
+try:  # standalone LiteRT runtime (pip install ai-edge-litert), else the one bundled with TensorFlow
+    from ai_edge_litert.interpreter import Interpreter
+except ImportError:
+    Interpreter = None
+
+
+def convert(model, quantization, batch_size):
+    """
+    Convert `model` to a TFLite flatbuffer for one fixed batch size.
+
+    "fp16" stores weights as float16; "int8" is dynamic-range quantization
+    (int8 weights, float activations), which needs no representative
+    dataset. Variables are frozen first and the batch dimension is static,
+    since the converter can't lower the LSTM's tensor lists otherwise.
+    """
+    import tensorflow as tf
+    from tensorflow.python.framework.convert_to_constants import convert_variables_to_constants_v2
+    from app.predictor import scaled_forward
+
+    spec = tf.TensorSpec((batch_size,) + tuple(model.input_shape[1:]), tf.uint8)
+    forward = scaled_forward(model).get_concrete_function(spec)
+    converter = tf.lite.TFLiteConverter.from_concrete_functions(
+        [convert_variables_to_constants_v2(forward)], model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantization == "fp16":
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantization != "int8":
+        raise ValueError(f"Unknown quantization: {quantization}")
+    return converter.convert()
+
+
+class TFLitePredictor:
+    """
+    `model.predict` stand-in backed by TFLite interpreters, one per batch
+    size (the flatbuffers have a static batch dimension). Like
+    CompiledPredictor, other sizes are padded up to the next converted one
+    or chunked past the largest. Inputs are uint8; scaling is part of the
+    converted graph.
+    """
+
+    def __init__(self, model, quantization="fp16", batch_sizes=(1, 2, 4, 8), threads=None):
+        if Interpreter is None:
+            import tensorflow as tf
+            interpreter_cls = tf.lite.Interpreter
+        else:
+            interpreter_cls = Interpreter
+        self.input_shape = model.input_shape
+        self.quantization = quantization
+        self.threads = threads
+        self.batch_sizes = sorted(set(int(b) for b in batch_sizes))
+        self.convert_s = 0.0
+        self._lock = threading.Lock()  # interpreters aren't thread-safe
+        self._interpreters = {}
+        for size in self.batch_sizes:
+            start = time.perf_counter()
+            interpreter = interpreter_cls(model_content=convert(model, quantization, size), num_threads=threads)
+            self.convert_s += time.perf_counter() - start
+            interpreter.allocate_tensors()
+            self._interpreters[size] = (interpreter,
+                                        interpreter.get_input_details()[0]["index"],
+                                        interpreter.get_output_details()[0]["index"])
+
+    def _bucket(self, n):
+        for size in self.batch_sizes:
+            if size >= n:
+                return size
+        return self.batch_sizes[-1]
+
+    def predict(self, batch, **kwargs):
+        """(N, seq_len, H, W, 3) uint8 -> (N, outputs) numpy array, like `model.predict`."""
+        batch = to_uint8(batch)
+        n = batch.shape[0]
+        outputs = []
+        with self._lock:
+            for start in range(0, n, self.batch_sizes[-1]):
+                chunk = batch[start:start + self.batch_sizes[-1]]
+                size = self._bucket(len(chunk))
+                if len(chunk) != size:
+                    padded = np.zeros((size,) + chunk.shape[1:], dtype=INPUT_DTYPE)
+                    padded[:len(chunk)] = chunk
+                    chunk = padded
+                interpreter, input_index, output_index = self._interpreters[size]
+                interpreter.set_tensor(input_index, chunk)
+                interpreter.invoke()
+                outputs.append(interpreter.get_tensor(output_index)[:min(size, n - start)].copy())
+        return np.concatenate(outputs, axis=0)
+
+
+def calibration_set(directory, samples=32, seq_len=30, size=(64, 64), seed=0, allow_random=None):
+    """
+    Up to `samples` sequences, one uniformly sampled from each video in
+    `directory`, as a uint8 (n, seq_len, H, W, 3) batch. Without any
+    readable video this raises ValueError: decision parity on noise passes
+    trivially, so random frames are only used with `allow_random` (default
+    Config.CALIBRATION_ALLOW_RANDOM), e.g. to smoke-test a conversion.
+    """
+    from app.detection.sampling import sample_frames
+
+    sequences = []
+    paths = []
+    if directory and os.path.isdir(directory):
+        paths = sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                       if name.lower().endswith(VIDEO_EXTENSIONS))
+    for path in paths:
+        if len(sequences) >= samples:
+            break
+        frames = sample_frames(path, seq_len, size)
+        if frames is not None and len(frames) == seq_len:
+            sequences.append(frames)
+    if sequences:
+        return np.stack(sequences)
+    allow_random = Config.CALIBRATION_ALLOW_RANDOM if allow_random is None else allow_random
+    if not allow_random:
+        raise ValueError(f"no calibration videos in {directory}")
+    log.warning("No calibration videos found, checking parity on random frames", extra={"dir": directory})
+    width, height = size
+    return np.random.default_rng(seed).integers(0, 256, (samples, seq_len, height, width, 3), dtype=INPUT_DTYPE)
+
+
+def check_parity(reference, candidate, batch, chunk=8):
+    """Compare REAL/FAKE decisions and probabilities of two predictors on `batch`."""
+    expected = np.concatenate([reference.predict(batch[i:i + chunk]) for i in range(0, len(batch), chunk)])
+    actual = np.concatenate([candidate.predict(batch[i:i + chunk]) for i in range(0, len(batch), chunk)])
+    flips = int(np.count_nonzero((expected > 0.5) != (actual > 0.5)))
+    return {"samples": len(batch), "flips": flips, "flip_rate": flips / len(batch),
+            "max_error": float(np.abs(expected - actual).max())}
+
+
+def build_backend(model, reference, backend=None, threads=None, batch_sizes=None,
+                  calibration_dir=None, samples=None, max_flip_rate=None):
+    """
+    Convert `model` for `backend` (default Config.INFERENCE_BACKEND) and
+    check it against the Keras `reference` predictor on the calibration set.
+    Returns (predictor, report); predictor is None when the backend is
+    "keras" or unknown, there are no calibration videos, conversion failed
+    or too many decisions flipped.
+    """
+    backend = backend or Config.INFERENCE_BACKEND
+    if backend == "keras":
+        return None, {"backend": "keras"}
+    if backend not in BACKENDS:
+        log.warning("Unknown inference backend %r, using Keras (choose from %s)", backend, ", ".join(BACKENDS))
+        return None, {"backend": backend, "error": "unknown backend"}
+    threads = Config.TFLITE_THREADS if threads is None else threads
+    max_flip_rate = Config.PARITY_MAX_FLIP_RATE if max_flip_rate is None else max_flip_rate
+    report = {"backend": backend, "threads": threads}
+    try:
+        # calibration first: without it the backend is refused, so don't convert
+        calibration = calibration_set(calibration_dir if calibration_dir is not None else Config.CALIBRATION_DIR,
+                                      samples or Config.CALIBRATION_SAMPLES, model.input_shape[1],
+                                      (model.input_shape[3], model.input_shape[2]))
+        candidate = TFLitePredictor(model, backend.split("-", 1)[1],
+                                    batch_sizes or Config.PREDICTOR_BATCH_SIZES, threads)
+        report["convert_s"] = round(candidate.convert_s, 2)
+        report.update(check_parity(reference, candidate, calibration))
+    except Exception as e:
+        log.warning("%s backend unavailable, using Keras: %s", backend, e)
+        report["error"] = str(e)
+        return None, report
+    if report["flip_rate"] > max_flip_rate:
+        log.warning("%s backend failed its parity check, using Keras", backend, extra=report)
+        report["error"] = f"{report['flips']}/{report['samples']} decisions changed"
+        return None, report
+    log.info("Using %s backend", backend, extra=report)
+    return candidate, report
@@ -1,14 +1,29 @@
 import os
-import cv2
 import numpy as np
-import threading
-import yt_dlp
-import queue
 import time
+import logging
 from flask import Blueprint, request, jsonify, Response, render_template, session, redirect, url_for
+from flask_socketio import join_room, leave_room
 from werkzeug.utils import secure_filename
-from tensorflow.keras.models import load_model
-from .utils import predict_video, predict_frame
+from .config import Config
+from .extensions import socketio
+from .models import registry, get_inference, ModelNotReady
+from .utils import predict_sequence
+from .detection.pipeline import StreamPipeline
+from .detection.grabber import LatestFrameGrabber, open_capture
+from .detection.resolver import StreamResolver
+from .detection.sampling import sample_frames
+from .detection.sessions import StreamRegistry, AdmissionError
+from .detection.encoding import AdaptiveQuality, PROFILE_NAMES
+from .detection.overlay import OverlayPublisher
+from .detection.jobs import JobManager, QueueFull
+from .detection.cache import ResultCache, save_upload, remove_upload
+from .detection.segments import SegmentScorer
+from .incremental import IncrementalScorer
+from . import metrics
+from .database import db, detection_log
+
+log = logging.getLogger(__name__)
 
 main = Blueprint("main", __name__)
 
@@ -18,58 +33,116 @@ main = Blueprint("main", __name__)
 UPLOAD_FOLDER = "uploads"
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
-MODEL_PATH = "G:/deepfake_detection 2/models/deepfake_detection_model.h5"
-model = load_model(MODEL_PATH)
-print("✅ Model loaded:", model.input_shape)
-
-cap = None
-stream_stop_event = threading.Event()
-lock = threading.Lock()
-frame_queue = queue.Queue(maxsize=2)  # buffer small to avoid lag
-stream_thread = None
-capture_thread = None
-latest_frame = None
-frame_info = {"label": "N/A", "confidence": 0.0, "fps": 0.0}
+# live streams, one per browser session, keyed by stream id
+streams = StreamRegistry.from_config()
+IDLE_INFO = {"label": "N/A", "confidence": 0.0, "fps": 0.0, "inference_fps": 0.0}
+
+
+# re-uploaded clips are answered from here without decoding; evicting an
+# entry also drops its content-addressed upload (see release_upload)
+results = ResultCache(db, Config.RESULT_CACHE_MAX_ENTRIES, Config.RESULT_CACHE_TTL,
+                      on_evict=lambda content_hash: release_upload(content_hash),
+                      evict_every=Config.RESULT_CACHE_EVICT_EVERY)
+
+
+def sampling_params(sequence_length=30, img_size=(64, 64)):
+    """Cache key part for how frames were sampled from an upload."""
+    params = f"seq={sequence_length};size={img_size[0]}x{img_size[1]};strategy={Config.SAMPLER_STRATEGY}"
+    if Config.FACE_CROP:
+        params += f";face={Config.FACE_MARGIN}"
+    return params
+
+
+def release_upload(content_hash):
+    """
+    Drop a stored upload once nothing refers to it. Uploads are
+    content-addressed, so the same file may back an active job or a cached
+    single-sample result; either keeps it (cached ones until eviction).
+    Otherwise it goes as soon as its own request is done with it: segment
+    timelines (never cached), failed, cancelled and rejected uploads.
+    """
+    if not jobs.uses(content_hash) and not results.holds(content_hash):
+        remove_upload(UPLOAD_FOLDER, content_hash)
+
+
+def notify_job(job):
+    # segment timelines aren't cached, only single-sample results
+    if job.state == "done" and job.content_hash and job.mode == "sample":
+        results.put(job.content_hash, registry.version, sampling_params(),
+                    job.result["result"], job.result["confidence"])
+    elif job.state == "done" and job.content_hash:
+        release_upload(job.content_hash)
+    elif job.state in ("failed", "cancelled") and job.content_hash:
+        release_upload(job.content_hash)
+    if job.state == "done":
+        detection_log.log("upload", job.result["result"], job.result["confidence"],
+                          username=job.owner, filename=job.filename, mode=job.mode)
+    socketio.emit("job_update", job.to_dict(), to=f"user:{job.owner}")
+
+def score_segments(video_path, early_exit=None, cancelled=None):
+    """Dense per-segment timeline for one upload (see app/detection/segments.py)."""
+    scorer = SegmentScorer.from_config(lambda batch: get_inference().predict(batch), early_exit)
+    return scorer.score(video_path, cancelled=cancelled)
+
+
+def upload_mode():
+    """("sample" | "segments", early_exit) from the upload form or query string."""
+    mode = request.values.get("mode", "sample")
+    early_exit = request.values.get("early_exit", type=int)
+    return mode, early_exit
+
+# uploads analysed in the background: decode in a process pool, score here
+jobs = JobManager.from_config(lambda frames: score_frames(frames, get_inference()), notify_job,
+                              segment_fn=lambda path, cancelled, **options: score_segments(path, cancelled=cancelled, **options))
+
+
+# scrape-time gauges for /metrics
+def _queue_depths():
+    depths = {"inference": 0, "annotate": 0}
+    for stream in streams.sessions():
+        if stream.pipeline is not None:
+            for stage, depth in stream.pipeline.queue_depths().items():
+                depths[stage] += depth
+    depths["model"] = registry.inference.stats()["pending"] if registry.inference is not None else 0
+    depths["jobs"] = jobs.pending()
+    return depths
+
+metrics.ACTIVE_STREAMS.set_function(lambda: len(streams))
+metrics.VIEWERS.set_function(lambda: sum(s.pipeline.broadcaster.subscribers
+                                         for s in streams.sessions() if s.pipeline is not None))
+metrics.QUEUE_DEPTH.set_function(_queue_depths)
+metrics.MODEL_READY.set_function(lambda: int(registry.state == "ready"))
 
 
 # =========================
 # Helpers
 # =========================
 def extract_frames(video_path, sequence_length=30, img_size=(64, 64)):
-    cap_local = cv2.VideoCapture(video_path)
-    if not cap_local.isOpened():
-        print(f"Could not open video: {video_path}")
-        return None
-    frame_count = int(cap_local.get(cv2.CAP_PROP_FRAME_COUNT))
-    if frame_count < sequence_length:
-        print(f"Video too short ({frame_count} frames, need {sequence_length})")
-        cap_local.release()
+    start = time.perf_counter()
+    frames = sample_frames(video_path, sequence_length, img_size, strategy=Config.SAMPLER_STRATEGY)
+    metrics.UPLOAD_DECODE.observe(time.perf_counter() - start)
+    if frames is None or len(frames) < sequence_length:
+        log.warning("Video too short", extra={"frames": 0 if frames is None else len(frames),
+                                               "needed": sequence_length})
         return None
-    indices = np.linspace(0, frame_count - 1, sequence_length, dtype=int)
-    frames = []
-    for idx in indices:
-        cap_local.set(cv2.CAP_PROP_POS_FRAMES, idx)
-        ret, frame = cap_local.read()
-        if not ret:
-            continue
-        frame = cv2.resize(frame, img_size)
-        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        frames.append(frame)
-    cap_local.release()
     return frames
 
 
+def score_frames(frames, model):
+    """(label, confidence) for one sampled clip of `sequence_length` frames."""
+    frames = np.expand_dims(np.asarray(frames), axis=0)  # uint8, scaled inside the predictor
+    prob = float(model.predict(frames)[0][0])
+    return ("FAKE", prob) if prob > 0.5 else ("REAL", 1 - prob)
+
+
 def predict_video(video_path, model, sequence_length=30):
     try:
         frames = extract_frames(video_path, sequence_length)
         if frames is None or len(frames) < sequence_length:
             return None, None
-        frames = np.array(frames) / 255.0
-        frames = np.expand_dims(frames, axis=0)
-        prob = float(model.predict(frames)[0][0])
-        return ("FAKE", prob) if prob > 0.5 else ("REAL", 1 - prob)
-    except Exception as e:
-        print(f"Error in predict_video: {e}")
+        return score_frames(frames, model)
+    except Exception:
+        log.exception("predict_video failed")
         return None, None
 
 
@@ -85,122 +158,71 @@ def login_required(f):
 # =========================
 # YouTube Stream Extractor
 # =========================
+# cached, de-duplicated yt_dlp resolution on a background pool
+resolver = StreamResolver()
+
+
 def get_youtube_stream_url(video_url: str) -> str:
-    """Convert Shorts/share links to playable URLs using yt_dlp."""
-    if "youtube.com/shorts/" in video_url:
-        video_url = video_url.replace("youtube.com/shorts/", "youtube.com/watch?v=")
-    elif "youtu.be/" in video_url:
-        video_url = video_url.replace("youtu.be/", "youtube.com/watch?v=")
-    print("🎬 Processed YouTube URL:", video_url)
-
-    ydl_opts = {"format": "best[ext=mp4]/best", "quiet": True}
-    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-        info = ydl.extract_info(video_url, download=False)
-        return info["url"]
+    """Convert Shorts/share links to playable URLs using yt_dlp (cached)."""
+    return resolver.resolve(video_url)
 
-# =========================
-# Background Thread
-# =========================
-def capture_frames():
-    global cap, stream_stop_event, frame_queue
-
-    print("🎥 Background capture thread started")
-    while not stream_stop_event.is_set():
-        success, frame = cap.read()
-        if not success:
-            break
-        try:
-            label, confidence = predict_frame(frame, model)
-            text = f"{label} ({confidence:.2f})"
-            color = (0, 255, 0) if label == "REAL" else (0, 0, 255)
-            cv2.putText(frame, text, (10, 30),
-                        cv2.FONT_HERSHEY_SIMPLEX, 1, color, 2)
-        except Exception as e:
-            print("Prediction error:", e)
-
-        # Encode frame
-        _, buffer = cv2.imencode(".jpg", frame)
-        if not frame_queue.full():
-            frame_queue.put(buffer.tobytes())
-
-    print("🛑 Background capture stopped")
-    with lock:
-        if cap and cap.isOpened():
-            cap.release()
-            cap = None
-        stream_stop_event.clear()
-
-#=========================
-def capture_loop():
-    """Background capture thread for streaming"""
-    global cap, latest_frame, frame_info
-    print("🎥 Capture loop started")
-    last_time = time.time()
-    frame_count = 0
-    while not stream_stop_event.is_set() and cap and cap.isOpened():
-        success, frame = cap.read()
-        if not success:
-            print("⚠️ Failed to read frame")
-            break
-
-        frame_count += 1
-        # Calculate FPS every 1 second
-        if time.time() - last_time >= 1.0:
-            frame_info["fps"] = frame_count / (time.time() - last_time)
-            frame_count = 0
-            last_time = time.time()
-            
-        # Optional: draw overlay
-        try:
-            label, confidence = predict_frame(frame, model)
-            frame_info["label"] = label
-            frame_info["confidence"] = float(confidence)
-            text = f"{label} ({confidence:.2f})"
-            color = (0, 255, 0) if label == "REAL" else (0, 0, 255)
-            cv2.putText(frame, text, (10, 30),
-                        cv2.FONT_HERSHEY_SIMPLEX, 1, color, 2)
-        except Exception as e:
-            print("Prediction error:", e)
-
-        _, buffer = cv2.imencode(".jpg", frame)
-        latest_frame = buffer.tobytes()
-    print("🛑 Capture loop exited")
-#=========================
+
+def open_url_source(video_url):
+    """Capture for a page URL; a cached media URL that no longer opens is re-resolved once."""
+    cap = open_capture(get_youtube_stream_url(video_url))
+    if not cap.isOpened():
+        cap.release()
+        resolver.invalidate(video_url)
+        cap = open_capture(get_youtube_stream_url(video_url))
+    return cap
 
 # =========================
 # Streaming Generator
 # =========================
-def gen_stream():
-    global cap, stream_stop_event, frame_queue, latest_frame
-
-    print("🟢 gen_stream started (serving frames)")
-    empty_count = 0
-
-    while not stream_stop_event.is_set():
-        if latest_frame is not None:
-            try:
-                yield (b"--frame\r\nContent-Type: image/jpeg\r\n\r\n" +
-                       latest_frame + b"\r\n")
-            except Exception as e:
-                print("🔌 Client disconnected:", e)
-                break
-        else:
-            empty_count += 1
-            if empty_count % 20 == 0:
-                print("⚠️ No frame yet...")
-            time.sleep(0.05)
-    print("🔴 gen_stream ended")
-    cleanup_camera()
-
-def cleanup_camera():
-    global cap, capture_thread
-    with lock:
-        if cap and cap.isOpened():
-            cap.release()
-        cap = None
-        capture_thread = None
-        stream_stop_event.clear()
-        print("📷 Camera released")
+def gen_stream(stream, profile="auto"):
+    """
+    MJPEG generator for one viewer. Sleeps until a new frame is published;
+    if this client is slow it skips straight to the newest one. Output size,
+    JPEG quality and frame rate follow `profile`, or adapt to how long
+    writes to this client take when it is "auto".
+    """
+    broadcaster = stream.pipeline.broadcaster
+    broadcaster.subscribe()
+    log.info("Viewer connected", extra={"stream_id": stream.stream_id[:8], "viewers": broadcaster.subscribers})
+    quality = AdaptiveQuality(profile)
+    seq = 0
+    try:
+        while not broadcaster.closed:
+            delay = quality.wait_time()
+            if delay:
+                time.sleep(delay)  # respect the profile's max FPS
+            seq, frame = broadcaster.wait_next(seq, quality.profile, timeout=1.0)
+            if frame is None:
+                continue
+            stream.touch()
+            write_start = time.time()
+            yield (b"--frame\r\nContent-Type: image/jpeg\r\n\r\n" +
+                   frame + b"\r\n")
+            quality.sent(time.time() - write_start)
+    finally:
+        # the stream itself stays up; it's reaped once nobody is watching
+        broadcaster.unsubscribe()
+        log.info("Viewer disconnected", extra={"stream_id": stream.stream_id[:8],
+                                               "viewers": broadcaster.subscribers})
+
+def emit_overlay(payload, room):
+    socketio.emit("overlay", payload, to=room)
+
+def stream_room(stream_id):
+    return f"stream:{stream_id}"
+
+def current_stream():
+    """The caller's own live stream, or None."""
+    user = session.get("user")
+    stream_id = request.args.get("stream") or session.get("stream_id")
+    if not user or not stream_id:
+        return None
+    return streams.get(stream_id, owner=user)
 
 # =========================
 # Routes
@@ -220,88 +242,261 @@ def analyze_video():
     if file.filename == "":
         return jsonify({"error": "Empty filename"}), 400
 
-    filename = secure_filename(file.filename)
-    filepath = os.path.join(UPLOAD_FOLDER, filename)
-    file.save(filepath)
+    mode, early_exit = upload_mode()
+    if mode not in ("sample", "segments"):
+        return jsonify({"error": f"Unknown mode: {mode}"}), 400
+
+    start = time.perf_counter()
+    content_hash, filepath = save_upload(file, UPLOAD_FOLDER)
+    if mode == "sample":
+        cached = results.get(content_hash, registry.version, sampling_params())
+        if cached is not None:
+            detection_log.log("upload", cached["result"], cached["confidence"], username=session["user"],
+                              filename=secure_filename(file.filename), mode=mode)
+            return jsonify(dict(cached, cached=True))
+
+    try:
+        inference = get_inference(timeout=Config.MODEL_READY_TIMEOUT)
+    except ModelNotReady as e:
+        release_upload(content_hash)
+        return jsonify({"error": str(e)}), 503
 
-    label, confidence = predict_video(filepath, model)
+    if mode == "segments":
+        try:
+            result = score_segments(filepath, early_exit)
+        finally:
+            release_upload(content_hash)
+        if result is None:
+            return jsonify({"error": "Not enough frames"}), 400
+        metrics.UPLOAD_LATENCY.labels(mode=mode).observe(time.perf_counter() - start)
+        detection_log.log("upload", result["result"], result["confidence"], username=session["user"],
+                          filename=secure_filename(file.filename), mode=mode)
+        return jsonify(result)
+
+    label, confidence = predict_video(filepath, inference)
     if label is None:
+        release_upload(content_hash)
         return jsonify({"error": "Not enough frames"}), 400
 
-    return jsonify({"result": label, "confidence": round(float(confidence), 2)})
+    confidence = round(float(confidence), 2)
+    results.put(content_hash, registry.version, sampling_params(), label, confidence)
+    metrics.UPLOAD_LATENCY.labels(mode=mode).observe(time.perf_counter() - start)
+    detection_log.log("upload", label, confidence, username=session["user"],
+                      filename=secure_filename(file.filename), mode=mode)
+    return jsonify({"result": label, "confidence": confidence})
+
+
+# ---------- Upload Jobs ----------
+@main.route("/detection/jobs", methods=["POST"])
+@login_required
+def submit_job():
+    if "file" not in request.files:
+        return jsonify({"error": "No file uploaded"}), 400
+    file = request.files["file"]
+    if file.filename == "":
+        return jsonify({"error": "Empty filename"}), 400
+    if jobs.pending() >= jobs.max_pending:
+        return jsonify({"error": "Too many uploads in progress, try again shortly"}), 429
+    mode, early_exit = upload_mode()
+    if mode not in ("sample", "segments"):
+        return jsonify({"error": f"Unknown mode: {mode}"}), 400
+
+    filename = secure_filename(file.filename)
+    content_hash, filepath = save_upload(file, UPLOAD_FOLDER)
+    if mode == "sample":
+        cached = results.get(content_hash, registry.version, sampling_params())
+        if cached is not None:
+            detection_log.log("upload", cached["result"], cached["confidence"], username=session["user"],
+                              filename=filename, mode=mode)
+            return jsonify(dict(cached, filename=filename, state="done", cached=True))
+
+    try:
+        job = jobs.submit(session["user"], filepath, filename, content_hash, mode, {"early_exit": early_exit})
+    except QueueFull as e:
+        release_upload(content_hash)
+        return jsonify({"error": str(e)}), 429
+    return jsonify(dict(job.to_dict(), status_url=url_for("main.job_status", job_id=job.id))), 202
+
+
+@main.route("/detection/jobs/<job_id>")
+@login_required
+def job_status(job_id):
+    job = jobs.get(job_id, owner=session["user"])
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    return jsonify(job.to_dict())
+
+
+@main.route("/detection/jobs/<job_id>", methods=["DELETE"])
+@login_required
+def cancel_job(job_id):
+    job = jobs.cancel(job_id, owner=session["user"])
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    return jsonify(job.to_dict())
+
+
+@socketio.on("connect")
+def join_user_room():
+    # job_update pushes go to every open tab of the logged-in user
+    user = session.get("user")
+    if user:
+        join_room(f"user:{user}")
+
+
+@socketio.on("join_stream")
+def join_stream_room(data):
+    """Subscribe this socket to 'overlay' pushes for the caller's own stream."""
+    user = session.get("user")
+    stream_id = (data or {}).get("stream_id") or session.get("stream_id")
+    if user and stream_id and streams.get(stream_id, owner=user) is not None:
+        join_room(stream_room(stream_id))
+        return {"joined": stream_id}
+    return {"error": "Stream not active"}
+
+
+@socketio.on("leave_stream")
+def leave_stream_room(data):
+    stream_id = (data or {}).get("stream_id") or session.get("stream_id")
+    if stream_id:
+        leave_room(stream_room(stream_id))
 
 
 # ---------- Start Stream ----------
 @main.route("/detection/live/start", methods=["POST"])
 @login_required
 def start_stream():
-    global cap, stream_stop_event, stream_thread, capture_thread
-
     data = request.get_json() or {}
     source = data.get("source", "webcam")
     video_url = data.get("url", "").strip()
-
-    # Stop any previous stream
-    stream_stop_event.set()
-    cleanup_camera()
+    profile = data.get("profile", Config.OUTPUT_PROFILE)
+    if source not in ("webcam", "url") or (source == "url" and not video_url):
+        return jsonify({"error": "Invalid source"}), 400
+    if profile != "auto" and profile not in PROFILE_NAMES:
+        return jsonify({"error": "Invalid profile"}), 400
+
+    # Replaces this browser session's previous stream, never anyone else's
+    stream_id = session.get("stream_id") or streams.new_id()
+    try:
+        stream = streams.open(stream_id, session["user"])
+    except AdmissionError as e:
+        return jsonify({"error": str(e)}), 429
+    session["stream_id"] = stream_id
+    stream.profile = profile
 
     try:
         if source == "webcam":
-            cap = cv2.VideoCapture(0)
-        elif source == "url" and video_url:
-            stream_url = get_youtube_stream_url(video_url)
-            cap = cv2.VideoCapture(stream_url)
+            cap = LatestFrameGrabber.from_source(0, name="webcam")
         else:
-            return jsonify({"error": "Invalid source"}), 400
+            # resolved and opened in the background so this returns straight
+            # away; reconnects go through the resolver cache again
+            resolver.prefetch(video_url)
+            cap = LatestFrameGrabber(lambda: open_url_source(video_url), name="url", open_async=True,
+                                     network=True)
 
         if not cap.isOpened():
+            streams.close(stream_id)
             return jsonify({"error": "Failed to open source"}), 500
 
-        stream_stop_event.clear()
-        capture_thread = threading.Thread(target=capture_loop, daemon=True)
-        capture_thread.start()
+        overlay = OverlayPublisher(emit_overlay, stream_room(stream_id), Config.OVERLAY_MIN_INTERVAL)
+        owner = session["user"]
+        name = video_url if source == "url" else None
+
+        logged = {"label": None, "at": 0.0}
+
+        def on_update(info, force=False):
+            # a new prediction, not just the fps refresh; only verdict changes
+            # (and one row per LIVE_LOG_INTERVAL s) reach the detection log
+            now = time.time()
+            if not force and (info["label"] != logged["label"] or now - logged["at"] >= Config.LIVE_LOG_INTERVAL):
+                logged.update(label=info["label"], at=now)
+                detection_log.log(source, info["label"], info["confidence"], username=owner,
+                                  filename=name, mode="live")
+            overlay.update(info, force)
 
-        print("🟢 Stream started successfully")
-        return jsonify({"status": "started"}), 200
+        stream.pipeline = StreamPipeline(cap, lambda batch: predict_sequence(batch, get_inference()),
+                                         on_update=on_update,
+                                         incremental=IncrementalScorer(registry.get_split)).start()
+
+        log.info("Stream started", extra={"stream_id": stream_id[:8], "source": source, "profile": profile})
+        return jsonify({"status": "started", "stream_id": stream_id}), 200
     except Exception as e:
-        print("❌ Error starting stream:", e)
-        cleanup_camera()
+        log.exception("Error starting stream", extra={"stream_id": stream_id[:8]})
+        streams.close(stream_id)
         return jsonify({"error": str(e)}), 500
 
 # ---------- MJPEG Feed ----------
 @main.route("/detection/live_feed")
 @login_required
 def stream_video():
-    global cap
-    if not cap or not cap.isOpened():
+    stream = current_stream()
+    if stream is None or not stream.running:
         return jsonify({"error": "Stream not active"}), 400
-    return Response(gen_stream(),
+    profile = request.args.get("profile", stream.profile)
+    if profile != "auto" and profile not in PROFILE_NAMES:
+        return jsonify({"error": "Invalid profile"}), 400
+    return Response(gen_stream(stream, profile),
                     mimetype="multipart/x-mixed-replace; boundary=frame")
 
 #--------------------
 @main.route("/detection/overlay_data")
 def overlay_data():
-    return jsonify(frame_info)
+    stream = current_stream()
+    if stream is None or stream.pipeline is None:
+        return jsonify(IDLE_INFO)
+    return jsonify(dict(stream.pipeline.info, stages=stream.pipeline.stats()))
+
+
+@main.route("/detection/inference_stats")
+@login_required
+def inference_stats():
+    if registry.inference is None:
+        return jsonify(registry.status())
+    return jsonify(registry.inference.stats())
+
+
+@main.route("/metrics")
+def prometheus_metrics():
+    """Prometheus text exposition of app/metrics.py."""
+    if not Config.METRICS_ENABLED:
+        return jsonify({"error": "Metrics disabled"}), 404
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
 
+@main.route("/health")
+def health():
+    """Readiness probe: 200 once the model is loaded, 503 while loading."""
+    status = registry.status()
+    return jsonify(status), 200 if status["state"] == "ready" else 503
+
+
+# ---------- Prefetch URL source ----------
+@main.route("/detection/live/prefetch", methods=["POST"])
+@login_required
+def prefetch_stream():
+    """Start resolving a URL source while the user is still on the form."""
+    video_url = (request.get_json() or {}).get("url", "").strip()
+    if not video_url:
+        return jsonify({"error": "Invalid source"}), 400
+    resolver.prefetch(video_url)
+    return jsonify({"status": "resolving"}), 202
 
 # ---------- Stop Stream ----------
 @main.route("/detection/live/stop", methods=["POST"])
 @login_required
 def stop_stream():
-    global stream_stop_event
-    print("🛑 Stop requested (event set)")
-    stream_stop_event.set()       # signal capture thread + generator
-    cleanup_camera()              # release camera immediately
+    stream_id = session.get("stream_id")
+    log.info("Stop requested", extra={"stream_id": (stream_id or "")[:8]})
+    if stream_id:
+        streams.close(stream_id)  # stop pipeline + release camera immediately
     return jsonify({"status": "stopped"}), 200
 
 # ---------- Logs ----------
 @main.route("/logs")
 @login_required
 def view_logs():
-    import sqlite3
-    conn = sqlite3.connect("logs.db")
-    cursor = conn.cursor()
-    cursor.execute("SELECT timestamp, filename, label, confidence FROM detections ORDER BY timestamp DESC")
-    logs = cursor.fetchall()
-    conn.close()
+    limit = min(request.args.get("limit", 200, type=int), 1000)
+    logs = db.query("SELECT timestamp, source, filename, label, confidence, mode FROM detections "
+                    "WHERE username=? ORDER BY timestamp DESC LIMIT ?", (session["user"], limit))
+    logs = [(time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ts)),) + tuple(row) for ts, *row in logs]
     return render_template("logs.html", logs=logs, user=session.get("user"))
@@ -1,45 +1,47 @@
+import logging
+
 import cv2
 import numpy as np
-from tensorflow.keras.models import load_model as keras_load_model
+from .detection.preprocess import resize_into, pad_sequence
+
+log = logging.getLogger(__name__)
 
 # Load model function
 def load_model(model_path="G:/deepfake_detection 2/deepfake_detection_model.h5"):
     """
     Loads the trained deepfake detection model.
     """
+    from tensorflow.keras.models import load_model as keras_load_model
+
     try:
         model = keras_load_model(model_path)
-        print(f"Model loaded successfully from {model_path}")
+        log.info("Model loaded", extra={"path": model_path})
         return model
     except Exception as e:
-        print(f"Error loading model: {e}")
+        log.error("Error loading model: %s", e, extra={"path": model_path})
         return None
 
 
 def extract_frames(video_path, max_frames=30, img_size=(64, 64)):
     """
-    Extract frames from video and preprocess them for the model.
+    Extract the first `max_frames` frames as a zero-padded (1, max_frames, H, W, 3)
+    uint8 RGB batch.
     """
-    frames = []
+    width, height = img_size
+    out = np.empty((max_frames, height, width, 3), dtype=np.uint8)
     cap = cv2.VideoCapture(video_path)
-    while len(frames) < max_frames:
+    n = 0
+    while n < max_frames:
         ret, frame = cap.read()
         if not ret:
             break
-        frame = cv2.resize(frame, img_size)
-        frame = frame.astype("float32") / 255.0
-        frames.append(frame)
+        resize_into(frame, out[n], img_size)
+        n += 1
     cap.release()
 
-    if len(frames) == 0:
+    if n == 0:
         return None
-
-    frames = np.array(frames)
-    # Pad if fewer than max_frames
-    if frames.shape[0] < max_frames:
-        pad = np.zeros((max_frames - frames.shape[0], img_size[0], img_size[1], 3))
-        frames = np.vstack([frames, pad])
-    return np.expand_dims(frames, axis=0)
+    return np.expand_dims(pad_sequence(out[:n], max_frames), axis=0)
 
 
 def predict_video(video_path, model):
@@ -49,46 +51,72 @@ def predict_video(video_path, model):
     try:
         frames = extract_frames(video_path)
         if frames is None:
-            print("No frames extracted.")
+            log.warning("No frames extracted", extra={"path": video_path})
             return None, None
 
         preds = model.predict(frames)
         confidence = float(preds[0][0])
         label = "FAKE" if confidence > 0.5 else "REAL"
         return label, confidence
-    except Exception as e:
-        print(f"Error in predict_video: {e}")
+    except Exception:
+        log.exception("predict_video failed")
         return None, None
 
-frames_buffer = []
-
-def predict_frame(frame, model):
-    global frames_buffer
-    frame = cv2.resize(frame, (64, 64))
-    frame = frame.astype("float32") / 255.0
-    frames_buffer.append(frame)
-
-    if len(frames_buffer) == 30:
-        seq = np.expand_dims(np.array(frames_buffer), axis=0)  # (1,30,64,64,3)
-        pred = model.predict(seq)[0][0]
-        label = "FAKE" if pred > 0.5 else "REAL"
-        frames_buffer.pop(0)  # sliding window
-        return label, float(pred)
-    
+def predict_frame(frame, model, window, cropper=None, gate=None, incremental=None):
+    """
+    Push one frame into the stream's own sliding `window` (a FrameWindow;
+    never shared between streams) and score the last 30 frames once the
+    window is full. A FaceCropper crops it to the face first;
+    a ChangeGate returns the previous score while the window barely changes;
+    an IncrementalScorer only runs the CNN on frames it hasn't seen yet.
+    """
+    window.push(cropper.crop(frame) if cropper is not None else frame, bgr_to_rgb=True)
+    if gate is not None:
+        gate.observe(window)
+
+    if window.is_full:
+        if gate is not None:
+            if not gate.allow() and gate.last_result is not None:
+                return gate.last_result
+            gate.last_result = _score_window(window, model, incremental)
+            return gate.last_result
+        return _score_window(window, model, incremental)
+
     return "WAITING", 0.0
 
 
-def open_video_stream(source: str):
+def _score_window(window, model, incremental):
+    batch = window.as_batch()
+    prob = incremental.predict(batch, window.pushed) if incremental is not None else None
+    if prob is None:
+        return predict_sequence(batch, model)
+    return ("FAKE" if prob > 0.5 else "REAL"), prob
+
+
+def predict_sequence(batch, model):
+    """
+    Score one (1, 30, 64, 64, 3) sequence; returns (label, fake probability).
+    """
+    pred = model.predict(batch)[0][0]
+    label = "FAKE" if pred > 0.5 else "REAL"
+    return label, float(pred)
+
+
+def open_video_stream(source: str, pace=None):
     """
-    Open a video stream from webcam, RTSP, HTTP, or file path.
+    Open a video stream from webcam, RTSP, HTTP, or file path as a
+    LatestFrameGrabber (newest frame only, reconnects live sources, files
+    paced to native fps unless `pace=False`).
     Example sources:
       - 0 (webcam)
       - 'rtsp://192.168.1.2:554/stream'
       - 'http://example.com/video.mp4'
       - 'videos/sample.mp4'
     """
-    cap = cv2.VideoCapture(source)
+    from .detection.grabber import LatestFrameGrabber
+
+    cap = LatestFrameGrabber.from_source(source, pace=pace, name=str(source))
     if not cap.isOpened():
         raise RuntimeError(f"Cannot open video source: {source}")
-    print(f"Opened video source: {source}")
+    log.info("Opened video source", extra={"source": source})
     return cap
@@ -0,0 +1,110 @@
+# benchmarks/__main__.py
+"""
+Run every benchmark suite and write one JSON report.
+
+    python -m benchmarks [--out bench.json] [--only sampling live] [--quick]
+                         [--compare baseline.json] [--tolerance 0.2]
+
+With --compare, every `mean_ms` that got slower than the baseline by more
+than --tolerance (a fraction) is listed, and the exit status is 1.
+"""
+import argparse
+import importlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+# suite -> (module, full kwargs, --quick kwargs)
+SUITES = {
+    "sampling": ("benchmarks.bench_sampling", {}, {"lengths": (300, 3000), "repeat": 2}),
+    "preprocess": ("benchmarks.bench_preprocess", {}, {"repeat": 50}),
+    "predictor": ("benchmarks.bench_predictor", {}, {"repeat": 10}),
+    "live": ("benchmarks.bench_live", {}, {"repeat": 10, "frames": 150}),
+    "jpeg": ("benchmarks.bench_jpeg", {}, {"repeat": 10}),
+    "upload": ("benchmarks.bench_upload", {}, {"repeat": 2, "frames": 300}),
+}
+
+
+def environment():
+    import cv2
+    import numpy as np
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "opencv": cv2.__version__,
+        "numpy": np.__version__,
+    }
+
+
+def flatten(data, prefix=""):
+    """{"a": {"b": {"mean_ms": 1}}} -> {"a.b": 1} for every timed case."""
+    out = {}
+    for key, value in data.items():
+        if isinstance(value, dict):
+            if "mean_ms" in value:
+                out[prefix + key] = value["mean_ms"]
+            else:
+                out.update(flatten(value, f"{prefix}{key}."))
+    return out
+
+
+def compare(report, baseline, tolerance):
+    new, old = flatten(report["suites"]), flatten(baseline.get("suites", {}))
+    regressions = []
+    for case, mean_ms in sorted(new.items()):
+        before = old.get(case)
+        if before and mean_ms > before * (1 + tolerance):
+            regressions.append({"case": case, "baseline_ms": before, "mean_ms": mean_ms,
+                                "change": round(mean_ms / before - 1, 3)})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--out", default="bench.json")
+    parser.add_argument("--only", nargs="+", choices=list(SUITES), help="run just these suites")
+    parser.add_argument("--quick", action="store_true", help="fewer repeats and shorter clips")
+    parser.add_argument("--compare", help="earlier report to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    report = {"environment": environment(), "quick": args.quick, "suites": {}}
+    for name in args.only or SUITES:
+        module, kwargs, quick = SUITES[name]
+        print(f"⏱️ {name} ...", flush=True)
+        start = time.perf_counter()
+        try:
+            report["suites"][name] = importlib.import_module(module).run(**(quick if args.quick else kwargs))
+        except Exception as e:
+            print(f"❌ {name} failed: {e}")
+            report["suites"][name] = {"error": str(e)}
+        print(f"   done in {time.perf_counter() - start:.1f}s")
+        # written after every suite so a crash still leaves the finished ones
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+
+    print(f"✅ Wrote {args.out}")
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for r in regressions:
+            print(f"⚠️ {r['case']}: {r['baseline_ms']} -> {r['mean_ms']} ms ({r['change']:+.0%})")
+        if regressions:
+            return 1
+        print("No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
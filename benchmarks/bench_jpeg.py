@@ -0,0 +1,54 @@
+# benchmarks/bench_jpeg.py
+"""
+MJPEG output: JPEG encode time per output profile and backend, and the
+broadcaster's shared-encode cost with several viewers on one profile.
+
+    python -m benchmarks.bench_jpeg [--repeat 50]
+"""
+import argparse
+import json
+
+import numpy as np
+
+from app.detection.broadcast import FrameBroadcaster
+from app.detection.encoding import JpegEncoder, PROFILES, TurboJPEG
+from benchmarks.common import time_call
+
+
+def run(repeat=50, resolution=(1280, 720), viewers=4):
+    width, height = resolution
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+    results = {"resolution": f"{width}x{height}"}
+
+    for backend in ("opencv", "turbojpeg"):
+        encoder = JpegEncoder(backend) if backend == "opencv" or TurboJPEG is not None else None
+        if encoder is None or encoder.backend != backend:
+            results[backend] = {"skipped": "not available"}
+            continue
+        results[backend] = {}
+        for profile in PROFILES:
+            stats = time_call(lambda p=profile: encoder.encode(frame, p), repeat)
+            stats["bytes"] = len(encoder.encode(frame, profile))
+            results[backend][profile.name] = stats
+
+    # one publish + `viewers` reads on the same profile: a single encode
+    broadcaster = FrameBroadcaster(JpegEncoder())
+
+    def fan_out():
+        broadcaster.publish(frame)
+        for _ in range(viewers):
+            broadcaster.latest(PROFILES[1])
+    results[f"broadcast_{viewers}_viewers"] = time_call(fan_out, repeat)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    print(json.dumps(run(args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# benchmarks/bench_live.py
+"""
+Live path with the stand-in model: per-frame `predict_frame` latency, and
+the three-stage StreamPipeline fed as fast as a synthetic source allows.
+
+    python -m benchmarks.bench_live [--repeat 50] [--frames 300]
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from app.detection.pipeline import StreamPipeline
+from app.detection.scheduler import InferenceScheduler
+from app.detection.window import FrameWindow
+from app.predictor import CompiledPredictor
+from app.utils import predict_frame, predict_sequence
+from benchmarks.common import build_standin_model, time_call
+
+
+class SyntheticCapture:
+    """cv2.VideoCapture look-alike serving `n_frames` moving frames at `fps` (0 = unpaced)."""
+
+    def __init__(self, n_frames, resolution=(1280, 720), fps=0):
+        width, height = resolution
+        self.base = np.random.default_rng(0).integers(0, 255, (height, width, 3), dtype=np.uint8)
+        self.n_frames = n_frames
+        self.interval = 1.0 / fps if fps else 0.0
+        self.read_count = 0
+
+    def isOpened(self):
+        return self.read_count < self.n_frames
+
+    def read(self):
+        if self.interval:
+            time.sleep(self.interval)
+        self.read_count += 1
+        return True, np.roll(self.base, 4 * self.read_count, axis=1)
+
+    def release(self):
+        self.read_count = self.n_frames
+
+
+def run_pipeline(predictor, frames=300, fps=0, mode="adaptive"):
+    cap = SyntheticCapture(frames, fps=fps)
+    pipeline = StreamPipeline(cap, lambda batch: predict_sequence(batch, predictor),
+                              scheduler=InferenceScheduler(mode))
+    start = time.perf_counter()
+    pipeline.start()
+    while pipeline.running:
+        time.sleep(0.01)
+    elapsed = time.perf_counter() - start
+    stats = pipeline.stats()
+    pipeline.stop()
+    return {
+        "frames": frames,
+        "elapsed_s": round(elapsed, 3),
+        "capture_fps": round(frames / elapsed, 1),
+        "predictions": stats["inference"]["count"],
+        "inference_ms": stats["inference"]["latency_ms"],
+        "capture_ms": stats["capture"]["latency_ms"],
+        "annotate_ms": stats["annotate"]["latency_ms"],
+        "gate_skip_rate": stats.get("gate", {}).get("skip_rate"),
+    }
+
+
+def run(repeat=50, frames=300):
+    predictor = CompiledPredictor(build_standin_model(), batch_sizes=(1, 8))
+    frame = np.random.default_rng(0).integers(0, 255, (720, 1280, 3), dtype=np.uint8)
+    window = FrameWindow()
+    for _ in range(window.seq_len):
+        window.push(frame)
+    return {
+        "predict_frame": time_call(lambda: predict_frame(frame, predictor, window), repeat),
+        "pipeline_unpaced": run_pipeline(predictor, frames),
+        "pipeline_30fps": run_pipeline(predictor, min(frames, 150), fps=30),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--frames", type=int, default=300)
+    args = parser.parse_args()
+    print(json.dumps(run(args.repeat, args.frames), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+# benchmarks/bench_predictor.py
+"""
+Per-call latency of `model.predict` vs CompiledPredictor vs the TFLite
+fp16 / int8 backends on the stand-in model.
+
+    python -m benchmarks.bench_predictor [--repeat 50]
+"""
+import argparse
+import json
+import time
+
+from app.detection.preprocess import normalize
+from app.predictor import CompiledPredictor
+from app.quantized import TFLitePredictor
+from benchmarks.common import build_standin_model, random_batch, time_call
+
+
+def run(repeat=50, batch_sizes=(1, 8)):
+    model = build_standin_model()
+
+    start = time.perf_counter()
+    predictor = CompiledPredictor(model, batch_sizes=batch_sizes)
+    results = {"trace_and_warmup_s": round(time.perf_counter() - start, 3)}
+    tflite = {q: TFLitePredictor(model, q, batch_sizes) for q in ("fp16", "int8")}
+    results["tflite_convert_s"] = {q: round(p.convert_s, 3) for q, p in tflite.items()}
+
+    for size in batch_sizes:
+        batch = random_batch(size)
+        results[f"batch_{size}"] = {
+            "model.predict": time_call(lambda: model.predict(normalize(batch), verbose=0), repeat),
+            "compiled": time_call(lambda: predictor.predict(batch), repeat),
+        }
+        for q, p in tflite.items():
+            results[f"batch_{size}"][f"tflite-{q}"] = time_call(lambda: p.predict(batch), repeat)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    print(json.dumps(run(args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# benchmarks/bench_preprocess.py
+"""
+Live preprocessing per frame: the old list-based resize/normalise/stack
+against the FrameWindow ring, plus the change gate and face cropper.
+
+    python -m benchmarks.bench_preprocess [--repeat 200]
+"""
+import argparse
+import json
+
+import cv2
+import numpy as np
+
+from app.detection.faces import FaceCropper
+from app.detection.gating import ChangeGate
+from app.detection.window import FrameWindow
+from benchmarks.common import time_call
+
+
+def list_window(frames, frame, seq_len=30, size=(64, 64)):
+    """The original predict_frame: resize, scale, append, rebuild the batch."""
+    frames.append(cv2.resize(frame, size).astype("float32") / 255.0)
+    if len(frames) > seq_len:
+        frames.pop(0)
+    return np.expand_dims(np.array(frames), axis=0)
+
+
+def run(repeat=200, resolution=(1280, 720)):
+    width, height = resolution
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+    results = {"resolution": f"{width}x{height}"}
+
+    frames = []
+    results["list_window"] = time_call(lambda: list_window(frames, frame), repeat)
+
+    window = FrameWindow()
+    results["window_push"] = time_call(lambda: window.push(frame), repeat)
+
+    def push_and_batch():
+        window.push(frame)
+        return window.as_batch()
+    results["window_push_batch"] = time_call(push_and_batch, repeat)
+
+    gate = ChangeGate()
+    results["gate_observe"] = time_call(lambda: gate.observe(window), repeat)
+
+    try:
+        cropper = FaceCropper(detect_every=5)
+    except ValueError as e:
+        # the crop path silently turns itself off in the app; make that visible here
+        results["face_crop"] = {"skipped": f"{e} (OpenCV {cv2.__version__}, see requirements.txt)"}
+    else:
+        results["face_crop"] = time_call(lambda: window.push(cropper.crop(frame)), repeat)
+        results["face_crop"].update(cropper.stats())
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    print(json.dumps(run(args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
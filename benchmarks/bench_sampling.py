@@ -0,0 +1,76 @@
+# benchmarks/bench_sampling.py
+"""
+Upload frame sampling on synthetic videos of increasing length: the old
+per-index seek and full-decode extractors against the shared sampler.
+
+    python -m benchmarks.bench_sampling [--lengths 300 3000 9000]
+"""
+import argparse
+import json
+import os
+import tempfile
+
+import cv2
+
+from app.detection.sampling import sample_frames, sample_indices
+from benchmarks.common import time_call, write_synthetic_video
+
+
+def seek_per_index(path, seq_len=30, size=(64, 64)):
+    """The previous app/routes.py extractor: one seek per sampled index."""
+    cap = cv2.VideoCapture(path)
+    frames = []
+    for idx in sample_indices(int(cap.get(cv2.CAP_PROP_FRAME_COUNT)), seq_len):
+        cap.set(cv2.CAP_PROP_POS_FRAMES, int(idx))
+        ok, frame = cap.read()
+        if ok:
+            frames.append(cv2.resize(frame, size))
+    cap.release()
+    return frames
+
+
+def full_decode(path, seq_len=30, size=(64, 64)):
+    """The previous detection/routes.py extractor: read() every frame up to the last index."""
+    cap = cv2.VideoCapture(path)
+    wanted = set(sample_indices(int(cap.get(cv2.CAP_PROP_FRAME_COUNT)), seq_len).tolist())
+    frames = []
+    i = 0
+    while len(frames) < len(wanted):
+        ok, frame = cap.read()
+        if not ok:
+            break
+        if i in wanted:
+            frames.append(cv2.resize(frame, size))
+        i += 1
+    cap.release()
+    return frames
+
+
+def run(lengths=(300, 3000, 9000), repeat=3, workdir=None, fourcc="mp4v"):
+    workdir = workdir or os.path.join(tempfile.gettempdir(), "df_bench_videos")
+    os.makedirs(workdir, exist_ok=True)
+    results = {}
+    for n in lengths:
+        ext = "avi" if fourcc == "MJPG" else "mp4"
+        path = write_synthetic_video(os.path.join(workdir, f"synthetic_{fourcc}_{n}.{ext}"), n, fourcc=fourcc)
+        cases = {
+            "seek_per_index": lambda: seek_per_index(path),
+            "full_decode": lambda: full_decode(path),
+        }
+        for strategy in ("grab", "seek", "scan", "auto"):
+            cases[f"sampler_{strategy}"] = lambda s=strategy: sample_frames(path, strategy=s)
+        results[f"{n}_frames"] = {name: time_call(fn, repeat, warmup=1) for name, fn in cases.items()}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lengths", type=int, nargs="+", default=[300, 3000, 9000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--fourcc", default="mp4v", help="codec for the generated clips, e.g. mp4v, avc1, MJPG")
+    args = parser.parse_args()
+    print(json.dumps(run(args.lengths, args.repeat, fourcc=args.fourcc), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# benchmarks/bench_upload.py
+"""
+Upload end-to-end through the Flask app with the stand-in model: the
+synchronous analyze route (fresh and cached), segment mode, and a
+background job from submit to done.
+
+    python -m benchmarks.bench_upload [--repeat 5] [--frames 900]
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from app.config import Config
+from benchmarks.common import build_standin_model, time_call, write_synthetic_video
+
+
+def make_app(workdir):
+    """Flask test client on a throwaway model file and database (users, logs, result cache)."""
+    model_path = os.path.join(workdir, "standin.h5")
+    if not os.path.exists(model_path):
+        build_standin_model().save(model_path)
+    Config.MODEL_PATH = model_path
+    Config.DATABASE_PATH = os.path.join(workdir, "bench.db")
+
+    from app import create_app
+    from app.models import registry
+    app = create_app()
+    registry.get()  # wait for load + warm-up outside the timings
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["user"] = "bench"
+    return client
+
+
+def run(repeat=5, frames=900, workdir=None):
+    workdir = workdir or os.path.join(tempfile.gettempdir(), "df_bench_videos")
+    os.makedirs(workdir, exist_ok=True)
+    video = write_synthetic_video(os.path.join(workdir, f"synthetic_mp4v_{frames}.mp4"), frames)
+    client = make_app(workdir)
+    from app.routes import results
+
+    def post(url, **fields):
+        with open(video, "rb") as f:
+            resp = client.post(url, data=dict(fields, file=(f, "clip.mp4")))
+        assert resp.status_code in (200, 202), resp.get_json()
+        return resp.get_json()
+
+    def fresh():
+        results.evict(now=float("inf"))  # drop cached results so the clip is decoded again
+        return post("/detection/analyze")
+
+    def job():
+        results.evict(now=float("inf"))
+        status_url = post("/detection/jobs")["status_url"]
+        while client.get(status_url).get_json()["state"] not in ("done", "failed"):
+            time.sleep(0.005)
+
+    try:
+        return {
+            "video_frames": frames,
+            "analyze_sample": time_call(fresh, repeat, warmup=1),
+            "analyze_cached": time_call(lambda: post("/detection/analyze"), repeat, warmup=1),
+            "analyze_segments": time_call(lambda: post("/detection/analyze", mode="segments"), repeat, warmup=1),
+            "job_sample": time_call(job, repeat, warmup=1),
+        }
+    finally:
+        results.evict(now=float("inf"))  # and with them the stored uploads
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--frames", type=int, default=900)
+    args = parser.parse_args()
+    print(json.dumps(run(args.repeat, args.frames), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# benchmarks/common.py
+import os
+import time
+
+import cv2
+import numpy as np
+
+
+def build_standin_model(seq_len=30, size=(64, 64), seed=0):
+    """
+    Small randomly initialised CNN-LSTM with the production input shape
+    (None, seq_len, H, W, 3) and a single sigmoid output.
+    """
+    import tensorflow as tf
+    from tensorflow.keras import layers, models
+
+    tf.random.set_seed(seed)
+    width, height = size
+    model = models.Sequential([
+        layers.Input((seq_len, height, width, 3)),
+        layers.TimeDistributed(layers.Conv2D(8, 3, strides=2, activation="relu")),
+        layers.TimeDistributed(layers.Conv2D(16, 3, strides=2, activation="relu")),
+        layers.TimeDistributed(layers.GlobalAveragePooling2D()),
+        layers.LSTM(16),
+        layers.Dense(1, activation="sigmoid"),
+    ])
+    return model
+
+
+def random_batch(batch_size=1, seq_len=30, size=(64, 64), seed=0):
+    width, height = size
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 256, (batch_size, seq_len, height, width, 3), dtype=np.uint8)
+
+
+def time_call(fn, repeat=50, warmup=3):
+    """Run `fn` `repeat` times after `warmup` calls; returns per-call stats in ms."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000.0)
+    samples = np.array(samples)
+    return {
+        "mean_ms": round(float(samples.mean()), 3),
+        "p50_ms": round(float(np.percentile(samples, 50)), 3),
+        "p95_ms": round(float(np.percentile(samples, 95)), 3),
+        "repeat": repeat,
+    }
+
+
+def write_synthetic_video(path, n_frames, size=(640, 360), fps=30, fourcc="mp4v"):
+    """
+    Write a moving-pattern test clip. Frames change every step so the codec
+    can't collapse them, which keeps decode cost realistic.
+    """
+    if os.path.exists(path):
+        return path
+    width, height = size
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*fourcc), fps, (width, height))
+    if not writer.isOpened():
+        raise RuntimeError(f"Cannot write {fourcc} video to {path}")
+    rng = np.random.default_rng(0)
+    base = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+    for i in range(n_frames):
+        frame = np.roll(base, 4 * i, axis=1)
+        cv2.putText(frame, str(i), (20, height // 2), cv2.FONT_HERSHEY_SIMPLEX, 2, (255, 255, 255), 4)
+        writer.write(frame)
+    writer.release()
+    return path
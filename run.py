@@ -1,8 +1,10 @@
 # run.py
 from app import create_app, socketio
 
-app = create_app()
-
+# The app is only built here, not at import: upload decode workers are
+# spawned, and spawn re-imports this module in every child as __mp_main__.
+# `flask --app app run` uses the create_app factory directly.
 if __name__ == "__main__":
+    app = create_app()
     # debug=True is fine in dev; use proper server for production
     socketio.run(app, host="0.0.0.0", port=5000, debug=True)